@@ -0,0 +1,1001 @@
+# Helpers shared by the tiktok, yt-shorts, yt-channel and mixed-feed tools: browser launch and
+# context pools, latency budgets, challenge breakers, the static cache, profiling, the work
+# queue, the refresh scheduler and output encoding. Each tool adds this folder to sys.path.
+import asyncio, argparse, sys, os, sqlite3, uuid, math, random, time, threading
+import psutil, re, json
+from importlib.util import find_spec
+from pathlib import Path
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote
+from playwright.async_api import async_playwright
+from dataclasses import dataclass
+from typing import Dict, List, Set, Tuple
+from collections import deque, OrderedDict
+import hashlib
+import cProfile, pstats, io, gzip, textwrap
+
+try:
+    import orjson  # optional: faster JSON encoding
+except ImportError:
+    orjson = None
+
+try:
+    import httpx  # optional: browserless fast path (--http)
+except ImportError:
+    httpx = None
+
+HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+USER_AGENTS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
+)
+# English locales only: the unavailable-page patterns and count parsing expect English text
+LOCALES = (
+    ("en-US", "America/New_York"), ("en-US", "America/Chicago"), ("en-US", "America/Los_Angeles"),
+    ("en-GB", "Europe/London"), ("en-CA", "America/Toronto"), ("en-AU", "Australia/Sydney"),
+)
+VIEWPORTS = ((1280, 800), (1366, 768), (1440, 900), (1536, 864), (1600, 900), (1920, 1080))
+CHALLENGE_RETIRE = 3  # challenged pages before a context is replaced
+SQLITE_BATCH = 5000  # rows per insert transaction
+REFRESH_CYCLE = 900  # seconds between --refresh rounds
+WORKER_IDLE = 5  # seconds an idle worker waits before asking for a lease again
+# Playwright already passes the background-throttling, extension and background-networking
+# switches; these trim the rendering and media work a metadata scrape never looks at
+LEAN_FLAGS = (
+    "--disable-gpu",
+    "--disable-gpu-compositing",
+    "--disable-software-rasterizer",
+    "--disable-smooth-scrolling",
+    "--autoplay-policy=user-gesture-required",
+    "--disable-dev-shm-usage",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-domain-reliability",
+    "--no-pings",
+)
+LAUNCH_PROFILES = {
+    "default": {},  # Playwright's own arguments, chromium-headless-shell
+    "lean": {"args": list(LEAN_FLAGS)},
+    "minimal": {"args": [*LEAN_FLAGS, "--blink-settings=imagesEnabled=false"]},
+    "new-headless": {"args": list(LEAN_FLAGS), "channel": "chromium"},  # full Chromium build
+}
+LOG_FILE = "scrape.log"  # each tool points this at its own log in main()
+
+
+@dataclass
+class FastPathStats:
+    hits: int = 0
+    fallbacks: int = 0
+    challenges: int = 0
+
+    def report(self) -> str:
+        total = self.hits + self.fallbacks
+        rate = (self.hits / total * 100) if total else 0.0
+        return (f"HTTP fast path: {self.hits:,} hits, {self.fallbacks:,} fallbacks "
+                f"({self.challenges:,} challenged), {rate:.1f}% hit rate")
+
+class MemoryWatchdog:
+    """
+    Samples the RSS of the Playwright driver and Chromium processes (children of this process)
+    and counts the recycle/restart events triggered when they pass `limit_mb`.
+    """
+    def __init__(self, limit_mb: int):
+        self.limit = limit_mb * 1024 * 1024
+        self.recycles = 0
+        self.restarts = 0
+
+    def browser_rss(self) -> int:
+        total = 0
+        for child in psutil.Process(os.getpid()).children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return total
+
+    def over_limit(self) -> bool:
+        return self.limit > 0 and self.browser_rss() > self.limit
+
+    def report(self) -> str:
+        return f"Memory watchdog: {self.recycles:,} context recycles, {self.restarts:,} browser restarts"
+
+class CircuitBreaker:
+    """
+    Stops dispatching pages once challenges make up `threshold` of the last `window` results.
+    After `cooldown` seconds a single probe page is let through: a clean probe resumes the
+    run, a challenged one reopens the breaker for twice as long (capped at an hour).
+    """
+    def __init__(self, name: str, threshold: float = 0.5, cooldown: float = 300.0,
+                 window: int = 20, min_samples: int = 10):
+        self.threshold = threshold
+        self.base_cooldown = self.cooldown = cooldown
+        self.name = name
+        self.recent = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.state = "closed"  # closed -> open -> half_open -> closed or open
+        self.reopen_at = 0.0
+        self.trips = 0
+
+    async def admit(self) -> bool:
+        """
+        Wait until a page may be dispatched. Returns True for the half-open probe.
+        """
+        while True:
+            if self.state == "closed":
+                return False
+            if self.state == "open" and time.monotonic() >= self.reopen_at:
+                self.state = "half_open"
+                return True
+            await asyncio.sleep(1)
+
+    def record(self, challenged: bool, probe: bool = False) -> None:
+        if probe:
+            if challenged:
+                self.cooldown = min(self.cooldown * 2, 3600.0)
+                self.trip(f"{self.name} probe challenged again")
+            else:
+                self.state = "closed"
+                self.cooldown = self.base_cooldown
+                self.recent.clear()
+                log(f"{self.name} probe passed, resuming")
+                print(f"\n{Colors.GRAY}  [{self.name} probe passed, resuming]{Colors.RESET}", flush=True)
+            return
+        if self.state != "closed":
+            return  # dispatched before the breaker tripped
+        self.recent.append(challenged)
+        if len(self.recent) >= self.min_samples and sum(self.recent) / len(self.recent) >= self.threshold:
+            self.trip(f"{sum(self.recent)} of the last {len(self.recent)} {self.name} pages were challenged")
+
+    def trip(self, reason: str) -> None:
+        self.state = "open"
+        self.trips += 1
+        self.reopen_at = time.monotonic() + self.cooldown
+        message = f"{reason}; pausing for {self.cooldown:.0f}s before one probe"
+        log(message)
+        print(f"\n{Colors.GRAY}  [{message}]{Colors.RESET}", flush=True)
+
+class Deadline:
+    """
+    Total time allowed for one URL, shared by navigation, selector waits, extraction and retries.
+    """
+    def __init__(self, budget: "LatencyBudget", seconds: float):
+        self.budget = budget
+        self.started = time.monotonic()
+        self.expires = self.started + seconds
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires
+
+    def remaining_ms(self, share: float = 1.0) -> float:
+        return max(1.0, (self.expires - time.monotonic()) * 1000 * share)
+
+    def finish(self) -> None:
+        self.budget.record(time.monotonic() - self.started)
+
+class LatencyBudget:
+    """
+    Adaptive per-URL deadline: `factor` x the running p95 of successful URLs, clamped to
+    [floor, ceiling]. Until `warmup` samples exist the ceiling is used.
+    """
+    def __init__(self, ceiling: float = 60.0, floor: float = 10.0, factor: float = 3.0,
+                 window: int = 500, warmup: int = 20):
+        self.ceiling = ceiling
+        self.floor = min(floor, ceiling)
+        self.factor = factor
+        self.warmup = warmup
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def p95(self) -> float | None:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def seconds(self) -> float:
+        if len(self.samples) < self.warmup:
+            return self.ceiling
+        return max(self.floor, min(self.ceiling, self.factor * self.p95()))
+
+    def start(self) -> Deadline:
+        return Deadline(self, self.seconds())
+
+class Colors:
+    RESET = "\033[0m"
+    GREEN = "\033[32m"
+    CYAN = "\033[36m"
+    BLUE = "\033[34m"
+    GRAY = "\033[90m"
+
+def log(message: str) -> None:
+    with open(LOG_FILE, "a", encoding="utf-8") as log_file:
+        log_file.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} - {message}\n")
+
+def time_taken(start: float, stop: float) -> str:
+    elapsed = stop - start
+    hours = int(elapsed // 3600)
+    minutes = int((elapsed % 3600) // 60)
+    seconds = int(elapsed % 60)
+
+    parts = []
+    if hours:
+        parts.append(f"{hours}h")
+    if minutes:
+        parts.append(f"{minutes}m")
+    if seconds or not parts:
+        parts.append(f"{seconds}s")
+
+    return " ".join(parts)
+
+def open_output(filepath: Path, text: bool = False, append: bool = False):
+    """
+    Open an output file for writing, compressed by extension: .gz (gzip) or .zst (zstandard).
+    """
+    mode = "ab" if append else "wb"
+    suffix = filepath.suffix.lower()
+    if suffix == ".gz":
+        raw = gzip.open(filepath, mode)
+    elif suffix == ".zst":
+        try:
+            import zstandard
+        except ImportError:
+            sys.exit(f"Error: writing '{filepath}' needs the 'zstandard' package.")
+        raw = zstandard.ZstdCompressor().stream_writer(open(filepath, mode))
+    else:
+        raw = open(filepath, mode)
+    return io.TextIOWrapper(raw, encoding="utf-8", newline="") if text else raw
+
+def encode_json(obj, pretty: bool = False) -> bytes:
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=4).encode("utf-8")
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def write_json_array(items, output_file, pretty: bool = False) -> None:
+    """
+    Write a JSON array one element at a time instead of encoding the whole list at once.
+    """
+    output_file.write(b"[")
+    for i, item in enumerate(items):
+        if i:
+            output_file.write(b",")
+        if pretty:
+            output_file.write(b"\n" + textwrap.indent(encode_json(item, pretty).decode("utf-8"), "    ").encode("utf-8"))
+        else:
+            output_file.write(encode_json(item))
+    output_file.write(b"\n]" if pretty and items else b"]")
+
+def count_to_int(value: str) -> int | None:
+    """
+    "1,234" / "12.5K" / "3M" -> int; anything without a number (e.g. "N/A", "Like") -> None.
+    """
+    match = re.search(r'(\d[\d,]*(?:\.\d+)?)\s*([KMB])?', str(value), re.I)
+    if not match:
+        return None
+    number = float(match.group(1).replace(',', ''))
+    scale = {"k": 1_000, "m": 1_000_000, "b": 1_000_000_000}.get((match.group(2) or "").lower(), 1)
+    return int(number * scale)
+
+class RefreshScheduler:
+    """
+    Decides which tracked items a --refresh round re-scrapes. Every item gets a refresh
+    interval that grows with its age and shrinks with its recent like growth; an item is
+    due once its last snapshot is older than that interval, most overdue first.
+
+    `db` is the tool's snapshot database, `item_id` maps a URL to its `items` key and
+    `posted_at(value, first_seen)` turns the `posted_column` of `items` into an upload time.
+    """
+    min_hours = 1.0
+    max_hours = 24.0 * 7
+
+    def __init__(self, db, item_id, posted_at, posted_column: str = "item_id"):
+        self.db = db
+        self.item_id = item_id
+        self.posted_at = posted_at
+        self.posted_column = posted_column
+
+    def add(self, urls: List[str]) -> int:
+        # new URLs have no snapshot yet, which makes them due immediately
+        now = int(time.time())
+        with self.db:
+            return self.db.executemany(
+                "INSERT OR IGNORE INTO items (item_id, link, first_seen, last_seen) VALUES (?, ?, ?, ?)",
+                ((self.item_id(url), url, now, now) for url in urls)
+            ).rowcount
+
+    def interval(self, age_hours: float, likes: int | None, growth: float) -> float:
+        hours = age_hours / 8  # a day-old item every 3h, a month-old one every ~4 days
+        if likes and growth > 0:
+            hours /= 1 + growth * 24 / likes  # relative growth per day
+        return min(max(hours, self.min_hours), self.max_hours)
+
+    def due(self, n: int) -> List[str]:
+        rows = self.db.execute(f"""
+            WITH ranked AS (
+                SELECT item_id, taken_at, status, likes,
+                       ROW_NUMBER() OVER (PARTITION BY item_id ORDER BY taken_at DESC) AS rn
+                FROM snapshots
+            )
+            SELECT i.{self.posted_column}, i.link, i.first_seen, a.taken_at, a.status, a.likes, b.taken_at, b.likes
+            FROM items i
+            LEFT JOIN ranked a ON a.item_id = i.item_id AND a.rn = 1
+            LEFT JOIN ranked b ON b.item_id = i.item_id AND b.rn = 2
+        """)
+        now = time.time()
+        ranked = []
+        for posted, link, first_seen, taken_at, status, likes, prev_taken_at, prev_likes in rows:
+            if status == "deleted":
+                continue
+            if taken_at is None:
+                ranked.append((math.inf, link))
+                continue
+            growth = 0.0
+            if likes is not None and prev_likes is not None and taken_at > prev_taken_at:
+                growth = (likes - prev_likes) * 3600 / (taken_at - prev_taken_at)
+            if status == "ok":
+                interval = self.interval((now - self.posted_at(posted, first_seen)) / 3600, likes, growth)
+            elif status in ("challenged", "failed"):
+                interval = self.min_hours  # transient, retry soon
+            else:
+                interval = self.max_hours  # private / age-gated / region-blocked: check back rarely
+            overdue = (now - taken_at) / 3600 / interval
+            if overdue >= 1:
+                ranked.append((overdue, link))
+        ranked.sort(key=lambda r: r[0], reverse=True)
+        return [link for _, link in ranked[:n]]
+
+def new_http_client(connections: int):
+    """
+    Pooled keep-alive client; HTTP/2 is used when the `h2` package is installed.
+    """
+    return httpx.AsyncClient(
+        http2=find_spec("h2") is not None,
+        headers=HTTP_HEADERS,
+        limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+        timeout=httpx.Timeout(15.0, pool=None),
+        follow_redirects=True,
+    )
+
+async def wait_for_growth(items, seen: int, timeout: float = 2.0) -> bool:
+    """
+    Poll a locator until it holds more than `seen` elements or the timeout expires.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if await items.count() > seen:
+            return True
+        await asyncio.sleep(0.2)
+    return False
+
+class StaticCache:
+    """
+    On-disk cache for script, stylesheet and font responses, shared by every context and by
+    later runs (--cache-dir). Entries are keyed by URL and served without touching the network
+    while fresh; stale ones are revalidated with their ETag / Last-Modified. The least recently
+    used entries are evicted once the bodies in the directory exceed `limit_mb`, counting what
+    every process sharing it has stored.
+    """
+    pattern = re.compile(r"\.(?:m?js|css|woff2?|ttf|otf)(?:[?#]|$)", re.I)
+    dropped_headers = {"content-encoding", "content-length", "transfer-encoding"}
+
+    def __init__(self, directory: Path, limit_mb: int):
+        self.directory = directory
+        self.limit = limit_mb * 1024 ** 2
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.entries: OrderedDict[str, int] = OrderedDict()  # key -> body size, least recent first
+        self.size = 0
+        self.scan()
+        self.hits = self.revalidated = self.fetched = 0
+
+    async def attach(self, context) -> None:
+        await context.route(self.pattern, self.handle)
+
+    @staticmethod
+    def freshness(headers: Dict[str, str]) -> float | None:
+        """
+        Seconds the response may be served without revalidation, or None if it must not be stored.
+        """
+        cache_control = headers.get("cache-control", "").lower()
+        if "no-store" in cache_control or "private" in cache_control:
+            return None
+        if "immutable" in cache_control:
+            return 365 * 86400.0
+        match = re.search(r"max-age=(\d+)", cache_control)
+        if match and "no-cache" not in cache_control:
+            return float(match.group(1))
+        return 0.0 if "etag" in headers or "last-modified" in headers else None
+
+    def lookup(self, key: str) -> Tuple[dict, bytes] | None:
+        try:
+            meta = json.loads((self.directory / f"{key}.json").read_text(encoding="utf-8"))
+            body = (self.directory / f"{key}.body").read_bytes()
+        except (OSError, ValueError):
+            return None  # never stored, or evicted by another process
+        return meta, body
+
+    def write_meta(self, key: str, meta: dict) -> None:
+        partial = self.directory / f"{key}.json.part"
+        partial.write_text(json.dumps(meta), encoding="utf-8")
+        partial.replace(self.directory / f"{key}.json")
+
+    def scan(self) -> None:
+        """
+        Rebuild the size and LRU order from the directory, so the cap covers what every process
+        sharing it has stored; recency is the body's mtime, which touch() bumps on each hit.
+        """
+        bodies = []
+        for body in self.directory.glob("*.body"):
+            try:
+                stat = body.stat()
+            except FileNotFoundError:
+                continue  # evicted by another process mid-scan
+            bodies.append((stat.st_mtime, body.stem, stat.st_size))
+        self.entries = OrderedDict((key, size) for _, key, size in sorted(bodies))
+        self.size = sum(self.entries.values())
+
+    def touch(self, key: str) -> None:
+        if key in self.entries:
+            self.entries.move_to_end(key)
+        try:
+            os.utime(self.directory / f"{key}.body")
+        except OSError:
+            pass
+
+    def store(self, key: str, url: str, headers: Dict[str, str], body: bytes, freshness: float) -> None:
+        partial = self.directory / f"{key}.body.part"
+        partial.write_bytes(body)
+        partial.replace(self.directory / f"{key}.body")
+        self.write_meta(key, {
+            "url": url,
+            "expires": time.time() + freshness,
+            "headers": {k: v for k, v in headers.items() if k not in self.dropped_headers},
+        })
+        self.scan()  # other processes may have stored (or evicted) since our last look
+        while self.size > self.limit and len(self.entries) > 1:
+            old, size = self.entries.popitem(last=False)
+            self.size -= size
+            for suffix in (".body", ".json"):
+                (self.directory / f"{old}{suffix}").unlink(missing_ok=True)
+
+    async def handle(self, route) -> None:
+        request = route.request
+        if request.method != "GET":
+            await route.fallback()
+            return
+        key = hashlib.sha256(request.url.encode()).hexdigest()
+        cached = self.lookup(key)
+        try:
+            if cached and cached[0]["expires"] > time.time():
+                self.hits += 1
+                self.touch(key)
+                await route.fulfill(status=200, headers=cached[0]["headers"], body=cached[1])
+                return
+
+            headers = dict(request.headers)
+            if cached:
+                if "etag" in cached[0]["headers"]:
+                    headers["if-none-match"] = cached[0]["headers"]["etag"]
+                if "last-modified" in cached[0]["headers"]:
+                    headers["if-modified-since"] = cached[0]["headers"]["last-modified"]
+            response = await route.fetch(headers=headers)
+
+            if cached and response.status == 304:
+                self.revalidated += 1
+                meta, body = cached
+                meta["expires"] = time.time() + (self.freshness(response.headers) or 0.0)
+                self.write_meta(key, meta)
+                self.touch(key)
+                await route.fulfill(status=200, headers=meta["headers"], body=body)
+                return
+
+            self.fetched += 1
+            body = await response.body()
+            freshness = self.freshness(response.headers)
+            if response.status == 200 and freshness is not None:
+                self.store(key, request.url, response.headers, body, freshness)
+            await route.fulfill(response=response, body=body)
+        except Exception:
+            # network error, or the page closed while the request was in flight
+            try:
+                await route.abort()
+            except Exception:
+                pass
+
+    def report(self) -> str:
+        return (f"Static cache: {self.hits:,} hits, {self.revalidated:,} revalidated, {self.fetched:,} fetched "
+                f"({self.size / 1024 ** 2:,.0f} MB on disk)")
+
+def storage_state_for(args: argparse.Namespace, index: int) -> str | None:
+    """
+    Round-robin over the saved storage states given with --state.
+    """
+    if not args.state:
+        return None
+    return str(args.state[index % len(args.state)])
+
+async def launch_browser(p, profile: str = "default"):
+    return await p.chromium.launch(headless=True, **LAUNCH_PROFILES[profile])
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args) -> None:
+        pass  # keep the benchmark table readable
+
+async def benchmark_profiles(directory: Path, loads: int, profiles: List[str], chunk_size: int) -> None:
+    """
+    Load the saved pages in `directory` from a local HTTP server, `loads` times under each
+    launch profile, `chunk_size` pages at a time, and compare pages/sec and peak RSS of the
+    browser processes.
+    """
+    fixtures = sorted(path.name for path in directory.iterdir() if path.suffix in (".html", ".htm"))
+    if not fixtures:
+        sys.exit(f"Error: no .html fixture pages found in '{directory}'.")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(FixtureHandler, directory=str(directory)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [f"http://127.0.0.1:{server.server_port}/{quote(name)}" for name in fixtures]
+    print(f"{Colors.CYAN}Benchmarking {len(profiles)} launch profiles on {len(urls)} fixture pages, "
+          f"{loads:,} loads each ({chunk_size} at a time)...{Colors.RESET}", flush=True)
+    print(f"{'profile':<14}{'launch':>9}{'pages/sec':>11}{'peak RSS':>12}{'failed':>8}", flush=True)
+
+    async with async_playwright() as p:
+        for name in profiles:
+            watchdog = MemoryWatchdog(0)
+            start = time.time()
+            try:
+                browser = await launch_browser(p, name)
+            except Exception as e:
+                print(f"{name:<14}  could not launch: {str(e).splitlines()[0]}", flush=True)
+                continue
+            launched = time.time() - start
+            context = await browser.new_context()
+            peak, failed = 0, 0
+            start = time.time()
+            for i in range(0, loads, chunk_size):
+                pages = [await context.new_page() for _ in range(min(chunk_size, loads - i))]
+                outcomes = await asyncio.gather(
+                    *(page.goto(urls[(i + j) % len(urls)], wait_until="load") for j, page in enumerate(pages)),
+                    return_exceptions=True,
+                )
+                failed += sum(1 for outcome in outcomes if isinstance(outcome, Exception))
+                peak = max(peak, watchdog.browser_rss())
+                await asyncio.gather(*(page.close() for page in pages), return_exceptions=True)
+            elapsed = time.time() - start
+            await browser.close()
+            row = (f"{name:<14}{launched:>8.2f}s{loads / elapsed:>11.1f}"
+                   f"{peak // (1024 * 1024):>9,} MB{failed:>8,}")
+            print(row, flush=True)
+            log(f"Launch profile benchmark: {row}")
+
+    server.shutdown()
+
+async def new_context(browser, args: argparse.Namespace, storage_state: str | None = None,
+                      fingerprint: Dict | None = None):
+    context = await browser.new_context(storage_state=storage_state, **(fingerprint or {}))
+    if args.static_cache:
+        await args.static_cache.attach(context)
+    return context
+
+def random_fingerprint() -> Dict:
+    locale, timezone = random.choice(LOCALES)
+    width, height = random.choice(VIEWPORTS)
+    return {
+        "user_agent": random.choice(USER_AGENTS),
+        "locale": locale,
+        "timezone_id": timezone,
+        "viewport": {"width": width, "height": height},
+    }
+
+class ContextPool:
+    """
+    Isolated browser contexts, each with its own user agent, locale, timezone, viewport and
+    cookie jar (seeded round-robin from --state). Pages are spread over the contexts that
+    have not been challenged; one that hits CHALLENGE_RETIRE challenges is closed between
+    chunks and replaced by a fresh identity. Indexes and iterates like a list of contexts.
+    """
+    def __init__(self, browser, args: argparse.Namespace):
+        self.browser = browser
+        self.args = args
+        self.contexts: List = []
+        self.challenges: Dict[int, int] = {}  # id(context) -> challenged pages
+        self.opened = 0
+        self.retired = 0
+
+    def __iter__(self):
+        return iter(self.contexts)
+
+    def __len__(self) -> int:
+        return len(self.contexts)
+
+    def __getitem__(self, index: int):
+        return self.contexts[index]
+
+    async def new_identity(self):
+        state = storage_state_for(self.args, self.opened)
+        self.opened += 1
+        return await new_context(self.browser, self.args, state, random_fingerprint())
+
+    async def open(self, n: int) -> "ContextPool":
+        self.contexts = [await self.new_identity() for _ in range(n)]
+        return self
+
+    async def close(self) -> None:
+        await asyncio.gather(*(context.close() for context in self.contexts), return_exceptions=True)
+        self.challenges.clear()
+
+    async def reopen(self, browser) -> "ContextPool":
+        # after close(): as many fresh identities on `browser`, keeping the opened/retired counts
+        self.browser = browser
+        return await self.open(len(self.contexts))
+
+    def healthy(self) -> List:
+        return [c for c in self.contexts if self.challenges.get(id(c), 0) < CHALLENGE_RETIRE] or self.contexts
+
+    def flag(self, context) -> None:
+        self.challenges[id(context)] = self.challenges.get(id(context), 0) + 1
+
+    async def retire_challenged(self) -> None:
+        # only called between chunks, when the pool has no open pages
+        for i, context in enumerate(self.contexts):
+            # counts carry over between chunks and are only dropped with the context
+            if self.challenges.get(id(context), 0) >= CHALLENGE_RETIRE:
+                self.challenges.pop(id(context))
+                await context.close()
+                self.contexts[i] = await self.new_identity()
+                self.retired += 1
+                log(f"Retired challenged context {i}, {self.retired} so far")
+
+async def open_contexts(browser, args: argparse.Namespace) -> ContextPool:
+    # at least one context per saved storage state
+    return await ContextPool(browser, args).open(max(args.contexts, len(args.state or [])))
+
+async def recycle_browser(p, browser, contexts: ContextPool, watchdog: MemoryWatchdog, args: argparse.Namespace):
+    """
+    Called between chunks, once every page is closed. Recycles the contexts and, if the
+    process tree is still over the limit, restarts Chromium. Returns (browser, contexts);
+    the pool is the same object, so its counters survive the recycle.
+    """
+    before = watchdog.browser_rss() // (1024 * 1024)
+    await contexts.close()
+    watchdog.recycles += 1
+    if watchdog.over_limit():
+        await browser.close()
+        browser = await launch_browser(p, args.launch_profile)
+        watchdog.restarts += 1
+    after = watchdog.browser_rss() // (1024 * 1024)
+    message = f"Browser RSS {before:,} MB over limit, recycled contexts ({after:,} MB after)"
+    log(message)
+    print(f"\n{Colors.GRAY}  [{message}]{Colors.RESET}", flush=True)
+    return browser, await contexts.reopen(browser)
+
+class RunProfiler:
+    """
+    --profile support: cProfile over the whole asyncio run, per-URL timings, and Playwright
+    traces recorded per chunk. Only the traces of chunks holding one of the slowest N URLs
+    or a failure are kept; the rest are deleted when the report is written. Chunks are numbered
+    over the profiler's lifetime, so --refresh rounds never overwrite each other's traces.
+    """
+    def __init__(self, directory: Path, slowest: int):
+        self.directory = directory
+        self.slowest = slowest
+        self.profile = cProfile.Profile()
+        self.timings: List[Tuple[float, str, str, int]] = []  # seconds, url, status, chunk
+        self.traces: Dict[int, List[Path]] = {}  # chunk number -> trace files
+        self.offsets: Dict[int, int] = {}  # chunk number -> index of its first URL in the batch
+        self.tracing: Set = set()  # the contexts themselves, so a recycled id is never mistaken for one
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    async def start_chunk(self, contexts: List, offset: int) -> int:
+        chunk = len(self.offsets)
+        self.offsets[chunk] = offset
+        for context in contexts:
+            if context not in self.tracing:
+                await context.tracing.start(screenshots=True, snapshots=True)
+                self.tracing.add(context)
+            await context.tracing.start_chunk()
+        return chunk
+
+    async def stop_chunk(self, contexts: List, chunk: int) -> None:
+        paths = []
+        for k, context in enumerate(contexts):
+            path = self.directory / f"trace-chunk{chunk}-url{self.offsets[chunk]}-ctx{k}.zip"
+            await context.tracing.stop_chunk(path=str(path))
+            paths.append(path)
+        self.traces[chunk] = paths
+
+    async def timed(self, url: str, chunk: int, coro):
+        started = time.monotonic()
+        result = await coro
+        self.timings.append((time.monotonic() - started, url, result.status, chunk))
+        return result
+
+    def write_report(self) -> Path:
+        slowest = sorted(self.timings, reverse=True)[:self.slowest]
+        failed = [t for t in self.timings if t[2] == "failed"]
+        keep = {t[3] for t in slowest + failed}
+        for chunk, paths in self.traces.items():
+            for path in paths:
+                if chunk not in keep:
+                    path.unlink(missing_ok=True)
+
+        self.profile.dump_stats(str(self.directory / "profile.prof"))
+        stats = io.StringIO()
+        pstats.Stats(self.profile, stream=stats).sort_stats("cumulative").print_stats(40)
+
+        def row(t: Tuple[float, str, str, int]) -> str:
+            traces = ", ".join(p.name for p in self.traces.get(t[3], [])) or "-"
+            return f"{t[0]:8.2f}s  {t[2]:<14} {t[1]}  [{traces}]"
+
+        lines = [f"URLs timed: {len(self.timings):,}"]
+        if self.timings:
+            ordered = sorted(t[0] for t in self.timings)
+            lines.append(f"p50 {ordered[len(ordered) // 2]:.2f}s, p95 {ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]:.2f}s, "
+                         f"max {ordered[-1]:.2f}s")
+        lines += ["", f"Slowest {len(slowest)} URLs:"] + [row(t) for t in slowest]
+        lines += ["", f"Failed URLs ({len(failed)}):"] + [row(t) for t in failed]
+        lines += ["", "cProfile (cumulative, top 40):", stats.getvalue()]
+        report = self.directory / "summary.txt"
+        report.write_text("\n".join(lines), encoding="utf-8")
+        return report
+
+def profile_dir(args: argparse.Namespace) -> Path:
+    # --warm-up, --benchmark and --worker return from parse_args before output paths are
+    # resolved, so a bare --csv/--json/--sqlite can still be the flag's True const here
+    outputs = [Path(o) for o in (args.csv, args.json, args.sqlite) if isinstance(o, (str, Path))]
+    return outputs[0].with_suffix(".profile") if outputs else Path("profile")
+
+class WorkQueue:
+    """
+    SQLite-backed URL queue with time-limited leases. A lease that is neither completed nor
+    heartbeated before it expires goes back to the queue, so a crashed worker loses nothing.
+    """
+    def __init__(self, path: Path, lease_seconds: float):
+        self.lease_seconds = lease_seconds
+        self.db = sqlite3.connect(path)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS queue (
+            url TEXT PRIMARY KEY,
+            state TEXT NOT NULL DEFAULT 'queued',
+            lease TEXT,
+            expires REAL,
+            result TEXT
+        )""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS queue_state ON queue (state, expires)")
+        self.db.commit()
+
+    def add(self, urls: List[str]) -> None:
+        with self.db:
+            self.db.executemany("INSERT OR IGNORE INTO queue (url) VALUES (?)", ((url,) for url in urls))
+
+    def requeue_expired(self) -> int:
+        with self.db:
+            return self.db.execute(
+                "UPDATE queue SET state = 'queued', lease = NULL, expires = NULL WHERE state = 'leased' AND expires < ?",
+                (time.time(),)
+            ).rowcount
+
+    def lease(self, n: int) -> Tuple[str | None, List[str]]:
+        expired = self.requeue_expired()
+        if expired:
+            log(f"Re-queued {expired} URLs from expired leases")
+        urls = [row[0] for row in self.db.execute("SELECT url FROM queue WHERE state = 'queued' LIMIT ?", (n,))]
+        if not urls:
+            return None, []
+        lease = uuid.uuid4().hex
+        expires = time.time() + self.lease_seconds
+        with self.db:
+            self.db.executemany("UPDATE queue SET state = 'leased', lease = ?, expires = ? WHERE url = ?",
+                                ((lease, expires, url) for url in urls))
+        return lease, urls
+
+    def heartbeat(self, lease: str) -> bool:
+        with self.db:
+            return self.db.execute("UPDATE queue SET expires = ? WHERE lease = ? AND state = 'leased'",
+                                   (time.time() + self.lease_seconds, lease)).rowcount > 0
+
+    def complete(self, results: List[dict]) -> None:
+        # first result wins if an expired lease was handed out twice
+        with self.db:
+            self.db.executemany(
+                "UPDATE queue SET state = 'done', lease = NULL, expires = NULL, result = ? WHERE url = ? AND state != 'done'",
+                ((json.dumps(r, ensure_ascii=False), r["link"]) for r in results)
+            )
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self.db.execute("SELECT state, COUNT(*) FROM queue GROUP BY state").fetchall())
+
+    def done(self) -> bool:
+        return self.db.execute("SELECT 1 FROM queue WHERE state != 'done' LIMIT 1").fetchone() is None
+
+    def results(self) -> List[dict]:
+        return [json.loads(row[0]) for row in self.db.execute("SELECT result FROM queue WHERE state = 'done'")]
+
+def split_address(address: str) -> Tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+async def serve_queue(urls: List[str], args: argparse.Namespace, record: type, save_outputs, label: str) -> None:
+    """
+    Coordinator: holds the queue and answers JSON-line requests from workers
+    (lease / heartbeat / complete) until every URL is done, then rebuilds the `record`
+    dataclasses from the results and writes them with the tool's `save_outputs`.
+    """
+    queue = WorkQueue(args.queue_db, args.lease)
+    queue.add(urls)
+    finished = asyncio.Event()
+    workers: Set = set()  # writers of the connected workers
+
+    async def handle(reader, writer) -> None:
+        workers.add(writer)
+        try:
+            while line := await reader.readline():
+                request = json.loads(line)
+                op = request.get("op")
+                if op == "lease":
+                    lease, leased = queue.lease(int(request.get("n", 10)))
+                    reply = {"lease": lease, "urls": leased, "lease_seconds": queue.lease_seconds, "done": queue.done()}
+                elif op == "heartbeat":
+                    reply = {"ok": queue.heartbeat(request["lease"])}
+                elif op == "complete":
+                    queue.complete(request["results"])
+                    reply = {"ok": True}
+                else:
+                    reply = {"error": f"unknown op {op!r}"}
+                writer.write((json.dumps(reply, ensure_ascii=False) + "\n").encode())
+                await writer.drain()
+                if queue.done():
+                    finished.set()
+        except (ConnectionError, ValueError, KeyError) as e:
+            log(f"Worker connection dropped: {e!r}")
+        finally:
+            workers.discard(writer)
+            writer.close()
+
+    host, port = split_address(args.serve)
+    server = await asyncio.start_server(handle, host, port, limit=2 ** 24)
+    print(f"{Colors.CYAN}Coordinator serving {len(urls):,} URLs on {host}:{port} (queue: {args.queue_db}){Colors.RESET}", flush=True)
+    start = time.time()
+    async with server:
+        while not queue.done():
+            try:
+                await asyncio.wait_for(finished.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                counts = queue.counts()
+                print(f"Progress: {counts.get('done', 0):,} done, {counts.get('leased', 0):,} leased, "
+                      f"{counts.get('queued', 0):,} queued", end='\r', flush=True)
+
+        # idle workers learn the queue is done on their next lease and hang up; give them
+        # one idle round, then close whoever is left so every handler ends on EOF
+        grace = time.time() + 2 * WORKER_IDLE
+        while workers and time.time() < grace:
+            await asyncio.sleep(0.2)
+        for writer in list(workers):
+            writer.close()
+        while workers:
+            await asyncio.sleep(0.05)
+    stop = time.time()
+
+    all_results = [record(**r) for r in queue.results()]
+    save_outputs(all_results, args)
+    print(f"\n{Colors.GREEN} Completed  {len(all_results):,} {label} in {time_taken(start, stop)}.{Colors.RESET}", flush=True)
+
+class QueueClient:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.lock = asyncio.Lock()
+
+    async def call(self, **request) -> dict:
+        # shielded: a caller cancelled mid-call must not leave its reply unread in the stream
+        return await asyncio.shield(self.exchange(request))
+
+    async def exchange(self, request: dict) -> dict:
+        async with self.lock:
+            self.writer.write((json.dumps(request, ensure_ascii=False) + "\n").encode())
+            await self.writer.drain()
+            line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("coordinator closed the connection")
+        return json.loads(line)
+
+async def keep_lease(client: QueueClient, lease: str, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        await client.call(op="heartbeat", lease=lease)
+
+async def run_worker(args: argparse.Namespace, breaker_name: str, http_fetch, scrape_chunk, batch: int, label: str) -> None:
+    """
+    Worker: leases `batch` URLs at a time from the coordinator, scrapes them with the tool's
+    `http_fetch` (--http) and `scrape_chunk` and returns the results, heartbeating while a
+    batch is in flight.
+    """
+    host, port = split_address(args.worker)
+    reader, writer = await asyncio.open_connection(host, port, limit=2 ** 24)
+    client = QueueClient(reader, writer)
+    processed = 0
+    print(f"{Colors.CYAN}Worker connected to {host}:{port}, leasing {batch} URLs at a time{Colors.RESET}", flush=True)
+
+    async with async_playwright() as p:
+        browser = await launch_browser(p, args.launch_profile)
+        contexts = await open_contexts(browser, args)
+        watchdog = MemoryWatchdog(args.max_browser_mb)
+        budget = LatencyBudget(ceiling=args.deadline)
+        breaker = CircuitBreaker(breaker_name, args.challenge_threshold, args.cooldown)
+        while True:
+            try:
+                reply = await client.call(op="lease", n=batch)
+            except ConnectionError:
+                break  # the coordinator finished and hung up while this worker was idle
+            if not reply["urls"]:
+                if reply["done"]:
+                    break
+                await asyncio.sleep(WORKER_IDLE)  # other workers still hold leases
+                continue
+
+            heartbeat = asyncio.create_task(keep_lease(client, reply["lease"], reply["lease_seconds"] / 3))
+            try:
+                results, browser_urls = [], reply["urls"]
+                if args.http:
+                    results, browser_urls, _ = await http_fetch(browser_urls, args)
+                results += await scrape_chunk(browser_urls, contexts, budget, processed, args.profiler, breaker)
+            finally:
+                heartbeat.cancel()
+                await asyncio.gather(heartbeat, return_exceptions=True)
+            await client.call(op="complete", lease=reply["lease"], results=[r.__dict__ for r in results])
+            processed += len(results)
+            print(f"Processed: {processed:,}", end='\r', flush=True)
+
+            await contexts.retire_challenged()
+            if watchdog.over_limit():
+                browser, contexts = await recycle_browser(p, browser, contexts, watchdog, args)
+
+        await browser.close()
+    writer.close()
+    print(f"\n{Colors.GREEN} Worker finished after {processed:,} {label}.{Colors.RESET}", flush=True)
+
+
+# YouTube payload helpers (yt-shorts, yt-channel)
+BROWSE_API = "/youtubei/v1/browse"
+
+def dig(node, *path):
+    """
+    Walk nested dicts/lists from a YouTube payload, returning None on any miss.
+    """
+    for key in path:
+        try:
+            node = node[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return node
+
+def find_renderers(node, name: str):
+    """
+    Yield every `name` renderer found anywhere in the payload, in document order.
+    """
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == name and isinstance(value, dict):
+                yield value
+            else:
+                yield from find_renderers(value, name)
+    elif isinstance(node, list):
+        for value in node:
+            yield from find_renderers(value, name)
+
+def api_text(node) -> str | None:
+    if not node:
+        return None
+    if "simpleText" in node:
+        return node["simpleText"]
+    if "runs" in node:
+        return "".join(run.get("text", "") for run in node["runs"])
+    return node.get("content")
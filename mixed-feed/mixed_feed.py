@@ -0,0 +1,291 @@
+import asyncio, argparse, sys, time, psutil
+from pathlib import Path
+from typing import Dict, List
+
+# the platform scrapers and their shared helpers live in their own folders; reuse them instead of copying them
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT / "common"), str(ROOT / "tiktok"), str(ROOT / "yt-shorts")]
+
+import scrape_common
+import tiktok
+import yt_shorts
+from playwright.async_api import async_playwright
+from scrape_common import (
+    LAUNCH_PROFILES, CircuitBreaker, Colors, LatencyBudget, launch_browser, log, MemoryWatchdog,
+    open_contexts, time_taken,
+)
+from tiktok import optimal_chunk_size
+
+
+PLATFORMS = {
+    # name: (module, URL test, chunk scraper, label)
+    "tiktok": (tiktok, tiktok.is_tiktok_url, tiktok.scrape_tiktok_chunk, "TikToks"),
+    "shorts": (yt_shorts, yt_shorts.is_short_url, yt_shorts.scrape_short_chunk, "Shorts"),
+}
+
+
+def load_mixed_links(file_path: Path) -> Dict[str, List[str]]:
+    """
+    Split a mixed URL list by platform; anything neither scraper handles is reported and dropped.
+    """
+    if not file_path.is_file():
+        sys.exit(f"Error: File '{file_path}' not found.")
+    routed: Dict[str, List[str]] = {name: [] for name in PLATFORMS}
+    skipped = 0
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for url in dict.fromkeys(line.strip() for line in f if line.strip()):
+            name = next((name for name, (_, matches, _, _) in PLATFORMS.items() if matches(url)), None)
+            if name:
+                routed[name].append(url)
+            else:
+                skipped += 1
+    if skipped:
+        print(f"{Colors.GRAY}  [Skipped {skipped:,} URLs that are neither TikTok nor YouTube Shorts]{Colors.RESET}", flush=True)
+    return routed
+
+def platform_args(args: argparse.Namespace, name: str) -> argparse.Namespace:
+    """
+    The namespace a platform module expects, with outputs named '<output>-<platform>.<ext>'.
+    """
+    base = args.output or "output"
+    return argparse.Namespace(
+        csv=Path(f"{base}-{name}.csv") if args.csv else None,
+        json=Path(f"{base}-{name}.json") if args.json else None,
+        sqlite=Path(f"{base}-{name}.db") if args.sqlite else None,
+        pretty=args.pretty,
+        state=None,
+        static_cache=None,
+        contexts=args.contexts,
+        deadline=args.deadline,
+        challenge_threshold=args.challenge_threshold,
+        cooldown=args.cooldown,
+        profiler=None,
+    )
+
+class SharedBrowser:
+    """
+    The one Chromium both platforms run on, its context pools and its single memory watchdog.
+    Platforms bracket each chunk with acquire()/release(). Once the browser is over the limit,
+    new chunks wait until every running chunk has finished; then every pool is recycled and,
+    if that is not enough, Chromium is restarted, as the standalone tools do.
+    """
+    def __init__(self, p, browser, args: argparse.Namespace):
+        self.p = p
+        self.browser = browser
+        self.args = args
+        self.watchdog = MemoryWatchdog(args.max_browser_mb)
+        self.pools: Dict[str, object] = {}
+        self.active = 0  # chunks with pages open
+        self.pending = False  # a recycle is waiting for the running chunks
+        self.idle = asyncio.Condition()
+
+    async def open(self, name: str, platform: argparse.Namespace) -> None:
+        async with self.idle:
+            self.pools[name] = await open_contexts(self.browser, platform)
+
+    async def acquire(self, name: str):
+        """
+        Wait out a pending recycle, then return the platform's current pool for one chunk.
+        """
+        async with self.idle:
+            await self.idle.wait_for(lambda: not self.pending)
+            self.active += 1
+            return self.pools[name]
+
+    async def release(self) -> None:
+        async with self.idle:
+            self.active -= 1
+            if not self.pending and self.watchdog.over_limit():
+                self.pending = True
+            if self.pending and self.active == 0:
+                # the last chunk out recycles; the lock keeps new chunks and closes out meanwhile
+                await self.recycle()
+                self.pending = False
+                self.idle.notify_all()
+
+    async def recycle(self) -> None:
+        watchdog = self.watchdog
+        before = watchdog.browser_rss() // (1024 * 1024)
+        for pool in self.pools.values():
+            await pool.close()
+        watchdog.recycles += 1
+        if watchdog.over_limit():
+            await self.browser.close()
+            self.browser = await launch_browser(self.p, self.args.launch_profile)
+            watchdog.restarts += 1
+        for pool in self.pools.values():
+            await pool.reopen(self.browser)
+        after = watchdog.browser_rss() // (1024 * 1024)
+        message = f"Browser RSS {before:,} MB over limit, recycled contexts of {', '.join(self.pools)} ({after:,} MB after)"
+        log(message)
+        print(f"\n{Colors.GRAY}  [{message}]{Colors.RESET}", flush=True)
+
+    async def close(self, name: str) -> None:
+        async with self.idle:
+            await self.pools.pop(name).close()
+
+async def run_platform(name: str, urls: List[str], pages: int, shared: SharedBrowser, args: argparse.Namespace, progress: Dict[str, int]) -> None:
+    """
+    Bulk loop for one platform on the shared browser: its own context pool, latency budget and
+    challenge breaker, with at most `pages` pages open at a time.
+    """
+    module, _, scrape_chunk, label = PLATFORMS[name]
+    platform = platform_args(args, name)
+    await shared.open(name, platform)
+    budget = LatencyBudget(ceiling=args.deadline)
+    breaker = CircuitBreaker(module.SITE, args.challenge_threshold, args.cooldown)
+    results = []
+
+    for i in range(0, len(urls), pages):
+        # the pool is fetched per chunk since a recycle replaces it
+        contexts = await shared.acquire(name)
+        try:
+            results += await scrape_chunk(urls[i:i + pages], contexts, budget, i, None, breaker)
+            await contexts.retire_challenged()
+        finally:
+            await shared.release()
+        progress[name] = len(results)
+        print("Progress: " + ", ".join(f"{PLATFORMS[n][3]} {done:,}" for n, done in progress.items()), end='\r', flush=True)
+
+    await shared.close(name)
+    print()
+    challenged = sum(1 for r in results if r.status == "challenged")
+    if challenged:
+        print(f"{Colors.GRAY}  [{challenged:,} {label} challenged, breaker tripped {breaker.trips} time(s)]{Colors.RESET}", flush=True)
+    module.save_outputs(results, platform)
+
+async def run_mixed(routed: Dict[str, List[str]], args: argparse.Namespace) -> None:
+    total = sum(len(urls) for urls in routed.values())
+    page_budget = optimal_chunk_size(total)
+    limits = {"tiktok": args.tiktok_pages, "shorts": args.shorts_pages}
+    pages = {
+        # unset limits split the machine's page budget in proportion to each platform's URLs
+        name: limits[name] or max(1, page_budget * len(urls) // total)
+        for name, urls in routed.items() if urls
+    }
+    print(f"{Colors.CYAN}Processing {total:,} URLs on one browser: "
+          + ", ".join(f"{len(routed[name]):,} {PLATFORMS[name][3]} ({n} pages)" for name, n in pages.items())
+          + f"{Colors.RESET}", flush=True)
+    start = time.time()
+    progress = {name: 0 for name in pages}
+
+    async with async_playwright() as p:
+        shared = SharedBrowser(p, await launch_browser(p, args.launch_profile), args)
+        await asyncio.gather(*(run_platform(name, routed[name], n, shared, args, progress) for name, n in pages.items()))
+        await shared.browser.close()
+        if shared.watchdog.recycles:
+            print(f"{Colors.GRAY}  [{shared.watchdog.report()}]{Colors.RESET}", flush=True)
+
+    stop = time.time()
+    print(f"\n{Colors.GREEN} Completed  {total:,} URLs in {time_taken(start, stop)}.{Colors.RESET}", flush=True)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Fetch metadata for a mixed list of TikTok and YouTube Shorts URLs on one shared browser."
+    )
+
+    parser.add_argument(
+        "-r", "--read",
+        type=Path,
+        required=True,
+        help="File containing TikTok and/or YouTube Shorts URLs, one per line"
+    )
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        metavar="BASENAME",
+        help="Base name for output files ('results' → results-tiktok.csv, results-shorts.csv)"
+    )
+
+    # Output flags; each platform gets its own file since their fields differ
+    parser.add_argument("--csv", action="store_true", help="Export each platform to '<output>-<platform>.csv'.")
+    parser.add_argument("--json", action="store_true", help="Export each platform to '<output>-<platform>.json'.")
+    parser.add_argument("--sqlite", action="store_true", help="Append snapshots to '<output>-<platform>.db'.")
+    parser.add_argument(
+        "--pretty",
+        action="store_true",
+        help="Indent JSON output."
+    )
+
+    # Per-platform concurrency
+    parser.add_argument(
+        "--tiktok-pages",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Concurrent TikTok pages (default: a share of the machine budget proportional to the TikTok URLs)."
+    )
+    parser.add_argument(
+        "--shorts-pages",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Concurrent Shorts pages (default: a share of the machine budget proportional to the Shorts URLs)."
+    )
+    parser.add_argument(
+        "--contexts",
+        type=int,
+        default=4,
+        metavar="N",
+        help="Browser identities per platform (default: 4)."
+    )
+
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=60.0,
+        metavar="SECONDS",
+        help="Upper bound on the total time per URL, retries included (default: 60)."
+    )
+    parser.add_argument(
+        "--challenge-threshold",
+        type=float,
+        default=0.5,
+        metavar="FRACTION",
+        help="Pause a platform once this share of its last 20 pages hit a challenge (default: 0.5)."
+    )
+    parser.add_argument(
+        "--cooldown",
+        type=float,
+        default=300.0,
+        metavar="SECONDS",
+        help="Pause before a single probe page once a platform's breaker trips (default: 300)."
+    )
+    parser.add_argument(
+        "--launch-profile",
+        choices=list(LAUNCH_PROFILES),
+        default="default",
+        help="Chromium launch flags for the shared browser (see the tiktok/yt-shorts --benchmark)."
+    )
+    parser.add_argument(
+        "--max-browser-mb",
+        type=int,
+        default=int(psutil.virtual_memory().total / (1024 ** 2) // 2),
+        metavar="MB",
+        help="Recycle every context, then restart the shared browser if needed, once it exceeds MB of RSS (default: half of system RAM, 0 disables)."
+    )
+
+    args = parser.parse_args()
+
+    if not (args.csv or args.json or args.sqlite):
+        parser.error("At least one output format (--csv, --json or --sqlite) is required.")
+    if args.tiktok_pages < 0 or args.shorts_pages < 0 or args.contexts <= 0:
+        parser.error("--tiktok-pages, --shorts-pages and --contexts must be positive numbers.")
+    if not 0 < args.challenge_threshold <= 1:
+        parser.error("--challenge-threshold must be between 0 and 1.")
+
+    return args
+
+
+async def main():
+    scrape_common.LOG_FILE = "mixed_feed.log"
+    args = parse_args()
+    routed = load_mixed_links(args.read)
+    if not any(routed.values()):
+        sys.exit("Error: no TikTok or YouTube Shorts URLs found.")
+    await run_mixed(routed, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,10 +1,49 @@
-import asyncio, argparse, sys, math, random, time
-import psutil, re
+import asyncio, argparse, sys, sqlite3, math, time
+import psutil, re, json
 from pathlib import Path
 from playwright.async_api import async_playwright
 from playwright_stealth import Stealth
 from dataclasses import dataclass
-from typing import List, Set, Tuple
+from typing import Dict, List, Set, Tuple
+
+try:
+    import orjson  # optional: faster JSON encoding
+except ImportError:
+    orjson = None
+
+try:
+    import httpx  # optional: browserless fast path (--http)
+except ImportError:
+    httpx = None
+
+# browser, queue, cache and output helpers shared with the other tools
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "common"))
+import scrape_common
+from scrape_common import (
+    LAUNCH_PROFILES, REFRESH_CYCLE, SQLITE_BATCH, benchmark_profiles, CircuitBreaker, Colors,
+    ContextPool, count_to_int, Deadline, FastPathStats, LatencyBudget, launch_browser, log,
+    MemoryWatchdog, new_context, new_http_client, open_contexts, open_output, profile_dir,
+    recycle_browser, RefreshScheduler, run_worker, RunProfiler, serve_queue, StaticCache,
+    storage_state_for, time_taken, wait_for_growth, write_json_array,
+)
+
+SITE = "TikTok"  # names this tool in breaker messages
+# elements of the verification page itself; plain "captcha" also matches scripts shipped on normal pages
+CHALLENGE_MARKERS = ("tiktok-verify-page", "verify-bar-close", "captcha-verify-container", "secsdk-captcha-drag")
+CHALLENGE_SELECTOR = "[id*='captcha'], [class*='captcha'], [class*='verify-bar']"
+
+# checked in order, so the generic "unavailable" wording goes last
+UNAVAILABLE_PATTERNS = {
+    "private": r"this (?:video|account) is private",
+    "region_blocked": r"(?:not available|unavailable) in your (?:country|region)",
+    "age_gated": r"may be inappropriate for some users|confirm your age|age-restricted",
+    "deleted": r"video currently unavailable|couldn.t find this (?:video|post)|this (?:video|post) (?:has been removed|isn.t available)",
+}
+UNAVAILABLE_TEXT = re.compile("|".join(UNAVAILABLE_PATTERNS.values()), re.I)
+# the error page's own container: captions and comments of a live video can quote the same phrases
+UNAVAILABLE_SELECTOR = "[class*='DivErrorContainer']"
+TIKTOK_STATUS_CODES = {10204: "deleted", 10216: "private"}
+ITEM_LIST_API = "/api/post/item_list/"
 
 
 @dataclass
@@ -17,13 +56,7 @@ class TiktokMetadata:
     shares: str
     bookmarks: str
     comment_count: str
-
-class Colors:
-    RESET = "\033[0m"
-    GREEN = "\033[32m"
-    CYAN = "\033[36m"
-    BLUE = "\033[34m"
-    GRAY = "\033[90m"
+    status: str = "ok"  # ok, deleted, private, age_gated, region_blocked, challenged, failed
 
 
 def optimal_chunk_size(n: int) -> int:
@@ -72,27 +105,6 @@ def optimal_chunk_size(n: int) -> int:
         return min(5, n)
 
 
-def log(message: str) -> None:
-    with open("tiktok.log", "a", encoding="utf-8") as log_file:
-        log_file.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} - {message}\n")
-
-
-def time_taken(start: float, stop: float) -> str:
-    elapsed = stop - start
-    hours = int(elapsed // 3600)
-    minutes = int((elapsed % 3600) // 60)
-    seconds = int(elapsed % 60)
-
-    parts = []
-    if hours:
-        parts.append(f"{hours}h")
-    if minutes:
-        parts.append(f"{minutes}m")
-    if seconds or not parts:
-        parts.append(f"{seconds}s")
-
-    return " ".join(parts)
-
 def is_tiktok_url(url: str) -> bool:
     return "tiktok.com/" in url
 
@@ -107,6 +119,25 @@ def description_sanitize(description: str) -> Tuple[str, str]:
     clean_description = re.sub(r'\s+', ' ', clean_description).strip()
     return clean_description, ' '.join(tags)
 
+def classify_unavailable(text: str) -> str | None:
+    for status, pattern in UNAVAILABLE_PATTERNS.items():
+        if re.search(pattern, text, re.I):
+            return status
+    return None
+
+def placeholder_metadata(url: str, status: str) -> TiktokMetadata:
+    return TiktokMetadata(
+        link=url,
+        title="N/A",
+        tags="",
+        likes="N/A",
+        author=get_author_from_url(url) if status != "failed" else "",
+        shares="N/A",
+        bookmarks="N/A",
+        comment_count="N/A",
+        status=status
+    )
+
 def load_links(file_path: Path = None) -> Set[str]:
     if file_path:
         if not file_path.is_file():
@@ -120,21 +151,240 @@ def save_tiktok_metadata_csv(metadatas: List[TiktokMetadata], filepath: Path) ->
     import csv
     fieldnames = [f for f in TiktokMetadata.__dataclass_fields__.keys() if f != "comments"]
 
-    with open(filepath, 'w', newline='', encoding='utf-8') as output_file:
+    with open_output(filepath, text=True) as output_file:
         dict_writer = csv.DictWriter(output_file, fieldnames=fieldnames)
         dict_writer.writeheader()
         for metadata in metadatas:
             row = {k: v for k, v in metadata.__dict__.items() if k != "comments"}
             dict_writer.writerow(row)
 
-def save_tiktok_metadata_json(metadatas: List[TiktokMetadata], filepath: Path) -> None:
-    import json
-    with open(filepath, 'w', encoding='utf-8') as output_file:
-        json.dump([s.__dict__ for s in metadatas], output_file, ensure_ascii=False, indent=4)
+def save_tiktok_metadata_json(metadatas: List[TiktokMetadata], filepath: Path, pretty: bool = False) -> None:
+    with open_output(filepath) as output_file:
+        write_json_array([s.__dict__ for s in metadatas], output_file, pretty)
+
+def video_id_from_url(url: str) -> str:
+    match = re.search(r'/video/(\d+)', url)
+    return match.group(1) if match else url
 
-async def fetch_tiktok_metadata(url: str, page, retry: int = 0) -> TiktokMetadata:
+def open_snapshot_db(filepath: Path):
+    db = sqlite3.connect(filepath)
+    db.execute("PRAGMA journal_mode = WAL")
+    db.execute("PRAGMA synchronous = NORMAL")
+    db.executescript("""
+        CREATE TABLE IF NOT EXISTS items (
+            item_id TEXT PRIMARY KEY,
+            link TEXT NOT NULL,
+            author TEXT,
+            title TEXT,
+            tags TEXT,
+            first_seen INTEGER NOT NULL,
+            last_seen INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS snapshots (
+            item_id TEXT NOT NULL,
+            taken_at INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            likes INTEGER,
+            shares INTEGER,
+            bookmarks INTEGER,
+            comments INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS snapshots_item_time ON snapshots (item_id, taken_at);
+        CREATE INDEX IF NOT EXISTS snapshots_time ON snapshots (taken_at);
+    """)
+    return db
+
+def save_tiktok_metadata_sqlite(metadatas: List[TiktokMetadata], filepath: Path) -> None:
+    """
+    Upsert the videos into `items` and append one typed row per video to `snapshots`,
+    so engagement growth across runs is an indexed lookup on (item_id, taken_at).
+    """
+    db = open_snapshot_db(filepath)
+    taken_at = int(time.time())
+    for start in range(0, len(metadatas), SQLITE_BATCH):
+        batch = metadatas[start:start + SQLITE_BATCH]
+        with db:
+            db.executemany("""
+                INSERT INTO items (item_id, link, author, title, tags, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (item_id) DO UPDATE SET
+                    author = excluded.author, title = excluded.title, tags = excluded.tags,
+                    last_seen = excluded.last_seen
+            """, [(video_id_from_url(m.link), m.link, m.author, m.title, m.tags, taken_at, taken_at)
+                  for m in batch if m.status == "ok"])
+            db.executemany("INSERT INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?)", [
+                (video_id_from_url(m.link), taken_at, m.status, count_to_int(m.likes), count_to_int(m.shares),
+                 count_to_int(m.bookmarks), count_to_int(m.comment_count))
+                if m.status == "ok" else (video_id_from_url(m.link), taken_at, m.status, None, None, None, None)
+                for m in batch
+            ])
+    db.close()
+
+def posted_at(item_id: str, first_seen: int) -> float:
+    # TikTok video IDs carry the upload time (unix seconds) in their top 32 bits
+    return int(item_id) >> 32 if item_id.isdigit() else first_seen
+
+def save_outputs(metadatas: List[TiktokMetadata], args: argparse.Namespace) -> None:
+    if args.csv:
+        save_tiktok_metadata_csv(metadatas, args.csv)
+        print(f"{Colors.GRAY}  [Saved CSV to: {args.csv}]{Colors.RESET}", flush=True)
+    if args.json:
+        save_tiktok_metadata_json(metadatas, args.json, args.pretty)
+        print(f"{Colors.GRAY}  [Saved JSON to: {args.json}]{Colors.RESET}", flush=True)
+    if args.sqlite:
+        save_tiktok_metadata_sqlite(metadatas, args.sqlite)
+        print(f"{Colors.GRAY}  [Saved snapshots to: {args.sqlite}]{Colors.RESET}", flush=True)
+
+def parse_tiktok_state(url: str, html: str) -> TiktokMetadata | None:
+    """
+    Build metadata from the rehydration JSON embedded in the video page, or None if it is missing.
+    """
+    match = re.search(r'<script id="__UNIVERSAL_DATA_FOR_REHYDRATION__"[^>]*>(.*?)</script>', html, re.S)
+    if not match:
+        return None
     try:
-        await page.goto(url, timeout=60000)
+        state = json.loads(match.group(1))
+    except ValueError:
+        return None
+
+    detail = state.get("__DEFAULT_SCOPE__", {}).get("webapp.video-detail", {})
+    item = (detail.get("itemInfo") or {}).get("itemStruct")
+    if detail.get("statusCode"):
+        status = TIKTOK_STATUS_CODES.get(detail["statusCode"]) or classify_unavailable(detail.get("statusMsg", ""))
+        return placeholder_metadata(url, status) if status else None
+    if not item:
+        return None
+    return metadata_from_item(url, item)
+
+def metadata_from_item(url: str, item: dict) -> TiktokMetadata:
+    """
+    TikTok's itemStruct, as found in the video page state and the profile item-list API.
+    """
+    stats = item.get("statsV2") or item.get("stats") or {}
+    title, tags = description_sanitize(item.get("desc", ""))
+    return TiktokMetadata(
+        link=url,
+        title=title,
+        tags=tags,
+        likes=str(stats.get("diggCount", "0")),
+        author=(item.get("author") or {}).get("uniqueId") or get_author_from_url(url),
+        shares=str(stats.get("shareCount", "0")),
+        bookmarks=str(stats.get("collectCount", "0")),
+        comment_count=str(stats.get("commentCount", "0"))
+    )
+
+def parse_item_list(payload: dict) -> List[TiktokMetadata]:
+    results = []
+    for item in payload.get("itemList") or []:
+        author = (item.get("author") or {}).get("uniqueId")
+        if item.get("id") and author:
+            results.append(metadata_from_item(f"https://www.tiktok.com/@{author}/video/{item['id']}", item))
+    return results
+
+def handle_from(value: str) -> str:
+    # "@name", "name" or a profile / video URL
+    match = re.search(r'@([\w.\-]+)', value)
+    return match.group(1) if match else value.strip()
+
+class ItemListCapture:
+    """
+    Collects video metadata from the item_list API responses a profile page fires while its
+    grid is scrolled; every response already carries the per-video stats.
+    """
+    def __init__(self, page):
+        self.items: Dict[str, TiktokMetadata] = {}  # link -> metadata, insertion ordered
+        self.has_more = True
+        self.pending: Set[asyncio.Task] = set()
+        page.on("response", self.on_response)
+
+    def on_response(self, response) -> None:
+        if ITEM_LIST_API in response.url and response.ok:
+            task = asyncio.ensure_future(self.consume(response))
+            self.pending.add(task)
+            task.add_done_callback(self.pending.discard)
+
+    async def consume(self, response) -> None:
+        try:
+            payload = await response.json()
+        except Exception:
+            return  # empty body (throttled) or not JSON
+        for metadata in parse_item_list(payload):
+            self.items.setdefault(metadata.link, metadata)
+        self.has_more = bool(payload.get("hasMore"))
+
+    async def settle(self) -> None:
+        if self.pending:
+            await asyncio.gather(*self.pending, return_exceptions=True)
+
+async def page_challenged(page) -> bool:
+    # the verification puzzle is rendered over the video page
+    try:
+        return await page.locator(CHALLENGE_SELECTOR).filter(visible=True).count() > 0
+    except Exception:
+        return False
+
+def is_challenge_response(response) -> bool:
+    if response.status_code in (403, 429) or "/captcha" in response.url.path:
+        return True
+    head = response.text[:20000].lower()
+    return any(marker in head for marker in CHALLENGE_MARKERS)
+
+async def http_tiktok_metadata(urls: List[str], args: argparse.Namespace) -> Tuple[List[TiktokMetadata], List[str], FastPathStats]:
+    """
+    Try every URL over plain HTTP. Returns (parsed results, URLs that need the browser, stats).
+    """
+    stats = FastPathStats()
+    if httpx is None:
+        print(f"{Colors.GRAY}  [httpx not installed, skipping HTTP fast path]{Colors.RESET}", flush=True)
+        return [], urls, stats
+
+    results: List[TiktokMetadata] = []
+    misses: List[str] = []
+
+    async with new_http_client(args.http_connections) as client:
+        async def fetch(url: str) -> None:
+            try:
+                response = await client.get(url)
+            except httpx.HTTPError as e:
+                log(f"HTTP fast path failed for {url}: {e!r}")
+                response = None
+            metadata = parse_tiktok_state(url, response.text) if response is not None else None
+            # a page whose state parsed is never a challenge, whatever scripts it ships
+            if metadata is None and response is not None and is_challenge_response(response):
+                stats.challenges += 1
+            if metadata:
+                stats.hits += 1
+                results.append(metadata)
+            else:
+                stats.fallbacks += 1
+                misses.append(url)
+
+        await asyncio.gather(*(fetch(url) for url in urls))
+
+    return results, misses, stats
+
+async def fetch_tiktok_metadata(url: str, page, retry: int = 0, deadline: Deadline | None = None) -> TiktokMetadata:
+    deadline = deadline or LatencyBudget().start()
+    try:
+        # navigation gets most of what is left; selector waits share the rest
+        await page.goto(url, timeout=deadline.remaining_ms(0.6))
+        page.set_default_timeout(deadline.remaining_ms())
+
+        # fail fast on deleted/private/blocked pages instead of waiting out the stat selectors
+        like_count = page.locator('strong[data-e2e="like-count"]')
+        error = page.locator(UNAVAILABLE_SELECTOR).filter(has_text=UNAVAILABLE_TEXT)
+        outcome = like_count.or_(error).or_(page.locator(CHALLENGE_SELECTOR))
+        await outcome.filter(visible=True).first.wait_for()
+        page.set_default_timeout(deadline.remaining_ms())
+        if not await like_count.first.is_visible():
+            if await page_challenged(page):
+                log(f"Challenged on {url}")
+                return placeholder_metadata(url, "challenged")
+            status = classify_unavailable(await error.first.inner_text()) if await error.count() else None
+            if status:
+                log(f"Skipping {url}: {status}")
+                return placeholder_metadata(url, status)
+
         comment_count = await page.locator('strong[data-e2e="comment-count"]').first.inner_text()
         likes = await page.locator('strong[data-e2e="like-count"]').first.inner_text()
         bookmarks = await page.locator('strong[data-e2e="undefined-count"]').first.inner_text()
@@ -142,12 +392,7 @@ async def fetch_tiktok_metadata(url: str, page, retry: int = 0) -> TiktokMetadat
         description = await page.locator('div[data-e2e="video-desc"]').first.inner_text()
         title, tags = description_sanitize(description)
         author = get_author_from_url(url)
-
-        # comment_button = page.get_by_role("button", name=re.compile("Read or add comments"))
-        # await comment_button.first.click()
-        # await asyncio.sleep(1.2)
-        # comment_block = page.locator('div[class="TUXTabBar-content"]').first
-        # comments = await comment_block.locator('span[data-e2e="comment-level-1"]').all_inner_texts()
+        deadline.finish()
 
         return TiktokMetadata(
             link=url,
@@ -160,97 +405,355 @@ async def fetch_tiktok_metadata(url: str, page, retry: int = 0) -> TiktokMetadat
             comment_count=comment_count
         )
     except Exception as e:
-        if retry < 3:
-            await asyncio.sleep(2 ** retry)
-            return await fetch_tiktok_metadata(url, page, retry + 1)
+        if await page_challenged(page):
+            log(f"Challenged on {url}")
+            return placeholder_metadata(url, "challenged")
+        if retry < 3 and not deadline.expired:
+            await asyncio.sleep(min(2 ** retry, deadline.remaining_ms() / 1000))
+            return await fetch_tiktok_metadata(url, page, retry + 1, deadline)
         else:
-            log(f"Failed to fetch metadata for {url}: {e}")
-            return TiktokMetadata(
-                link=url,
-                title="N/A",
-                tags="",
-                likes="0",
-                author="",
-                shares="0",
-                bookmarks="0",
-                comment_count="0"
-            )
+            log(f"Failed to fetch metadata for {url} after {retry + 1} attempt(s): {e}")
+            return placeholder_metadata(url, "failed")
+
+async def harvest_tiktok_comments(url: str, page, max_comments: int, idle_rounds: int = 3,
+                                  deadline: Deadline | None = None) -> List[str]:
+    """
+    Open the comment panel and scroll it until `max_comments` are loaded or no new comments appear.
+    `deadline` bounds navigation and the waits for the panel; the scrolling is bounded by `idle_rounds`.
+    """
+    deadline = deadline or LatencyBudget().start()
+    await page.goto(url, timeout=deadline.remaining_ms(0.6))
+    page.set_default_timeout(deadline.remaining_ms())
+    comment_button = page.get_by_role("button", name=re.compile("Read or add comments"))
+    await comment_button.first.click()
+    items = page.locator('span[data-e2e="comment-level-1"]')
+    try:
+        await items.first.wait_for(state="visible", timeout=min(10000, deadline.remaining_ms()))
+    except Exception:
+        return []  # comments disabled or none posted
+
+    idle = 0
+    while idle < idle_rounds:
+        seen = await items.count()
+        if seen >= max_comments:
+            break
+        await items.last.scroll_into_view_if_needed()
+        idle = 0 if await wait_for_growth(items, seen) else idle + 1
+
+    comments = await items.all_inner_texts()
+    return [c.strip() for c in comments if c.strip()][:max_comments]
+
+async def bulk_tiktok_comments(urls: List[str], contexts: "ContextPool", args: argparse.Namespace,
+                              breaker: CircuitBreaker | None = None) -> None:
+    """
+    Low-priority comment stage: runs after metadata with half the page budget and streams
+    one JSON line per video to `args.comments`. Pages are spread over the healthy contexts
+    of the pool and go through the same challenge breaker as the metadata stage; challenged
+    videos are logged and left out of the JSONL.
+    """
+    n = len(urls)
+    print(f"{Colors.CYAN}Harvesting up to {args.max_comments:,} comments for {n} TikToks...{Colors.RESET}", flush=True)
+    semaphore = asyncio.Semaphore(max(1, optimal_chunk_size(n) // 2))
+    budget = LatencyBudget(ceiling=args.deadline)
+    completed, challenged = 0, 0
+
+    with open_output(args.comments, text=True, append=True) as output_file:
+        async def worker(i: int, url: str) -> None:
+            nonlocal completed, challenged
+            async with semaphore:
+                probe = await breaker.admit() if breaker else False
+                healthy = contexts.healthy()
+                context = healthy[i % len(healthy)]
+                page = await context.new_page()
+                try:
+                    await Stealth().apply_stealth_async(page)
+                    comments = await harvest_tiktok_comments(url, page, args.max_comments, deadline=budget.start())
+                except Exception as e:
+                    log(f"Failed to harvest comments for {url}: {e}")
+                    comments = []
+                finally:
+                    hit = await page_challenged(page)
+                    await page.close()
+                if breaker:
+                    breaker.record(hit, probe)
+            if hit:
+                log(f"Challenged on {url} (comments)")
+                contexts.flag(context)
+                challenged += 1
+                return
+            output_file.write(json.dumps({"link": url, "count": len(comments), "comments": comments}, ensure_ascii=False) + "\n")
+            output_file.flush()
+            completed += 1
+            print(f"Comments: {completed:,} of {n:,}", end='\r', flush=True)
+
+        await asyncio.gather(*(worker(i, url) for i, url in enumerate(urls)))
+
+    if challenged:
+        print(f"{Colors.GRAY}  [Comments skipped for {challenged:,} challenged pages]{Colors.RESET}", flush=True)
+    print(f"{Colors.GRAY}  [Saved comments to: {args.comments}]{Colors.RESET}", flush=True)
+
+async def warm_up_storage_state(paths: List[Path], profile: str = "default") -> None:
+    """
+    Visit the TikTok home page once per path, get past the consent/cookie interstitial and
+    save the resulting storage state so later contexts start already past it.
+    """
+    async with async_playwright() as p:
+        browser = await launch_browser(p, profile)
+        for path in paths:
+            context = await browser.new_context()
+            page = await context.new_page()
+            await Stealth().apply_stealth_async(page)
+            await page.goto("https://www.tiktok.com/", timeout=LatencyBudget().start().remaining_ms())
+            consent = page.get_by_role("button", name=re.compile("Allow all|Accept all", re.I))
+            try:
+                await consent.first.click(timeout=5000)
+                await page.wait_for_load_state("networkidle", timeout=10000)
+            except Exception:
+                pass  # no interstitial served in this region
+            await context.storage_state(path=str(path))
+            await context.close()
+            print(f"{Colors.GRAY}  [Saved storage state to: {path}]{Colors.RESET}", flush=True)
+        await browser.close()
+
+async def scrape_tiktok_chunk(chunk_urls: List[str], contexts: ContextPool, budget: LatencyBudget, offset: int = 0,
+                              profiler: RunProfiler | None = None,
+                              breaker: CircuitBreaker | None = None) -> List[TiktokMetadata]:
+    """
+    Scrape one chunk concurrently, one page per URL spread across `contexts`.
+    """
+    chunk = await profiler.start_chunk(contexts, offset) if profiler else None
+    async def fetch(url: str, page) -> TiktokMetadata:
+        probe = await breaker.admit() if breaker else False
+        result = await fetch_tiktok_metadata(url, page, deadline=budget.start())
+        if result.status == "challenged":
+            contexts.flag(page.context)
+        if breaker:
+            breaker.record(result.status == "challenged", probe)
+        return result
+
+    tasks, pages = [], []
+    healthy = contexts.healthy()
+    for j, url in enumerate(chunk_urls):
+        page = await healthy[(offset + j) % len(healthy)].new_page()
+        await Stealth().apply_stealth_async(page)
+        pages.append(page)
+        task = fetch(url, page)
+        tasks.append(profiler.timed(url, chunk, task) if profiler else task)
+
+    # Process chunk with live progress
+    chunk_results: List[TiktokMetadata] = []
+
+    for coro in asyncio.as_completed(tasks):
+        try:
+            result = await coro
+            chunk_results.append(result)
+        except Exception as e:
+            print(f"\nTask failed: {e}", flush=True)
+
+    await asyncio.gather(*[page.close() for page in pages], return_exceptions=True)
+    if profiler:
+        await profiler.stop_chunk(contexts, chunk)
+    return chunk_results
 
 async def bulk_tiktok_metadata(urls: Set[str], args: argparse.Namespace) -> List[TiktokMetadata]:   
     url_list = list(urls)
     n = len(url_list)
     print(f"{Colors.CYAN}Processing {n} TikTok URLs...{Colors.RESET}", flush=True)
-    chunk_size = optimal_chunk_size(n)
     total_completed = 0
     all_results: List[TiktokMetadata] = []
+    start = time.time()
+
+    # browserless pass first; only the misses go through Chromium
+    browser_urls = url_list
+    if args.http:
+        all_results, browser_urls, stats = await http_tiktok_metadata(url_list, args)
+        total_completed = len(all_results)
+        print(f"{Colors.GRAY}  [{stats.report()}]{Colors.RESET}", flush=True)
+        log(stats.report())
+    chunk_size = optimal_chunk_size(len(browser_urls))
 
     async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context()
+        browser = await launch_browser(p, args.launch_profile)
+        contexts = await open_contexts(browser, args)
+        watchdog = MemoryWatchdog(args.max_browser_mb)
+        budget = LatencyBudget(ceiling=args.deadline)
+        breaker = CircuitBreaker(SITE, args.challenge_threshold, args.cooldown)
         # Process in chunks
-        start = time.time()
-        for i in range(0, n, chunk_size):
+        for i in range(0, len(browser_urls), chunk_size):
             print(f"Progress: {total_completed:,} of {n:,}", end='\r', flush=True)
-            chunk_urls = url_list[i:i + chunk_size]
-            tasks, pages = [], []
-            for url in chunk_urls:
-                page = await context.new_page()
-                await Stealth().apply_stealth_async(page)
-                pages.append(page)
-                tasks.append(fetch_tiktok_metadata(url, page))
+            chunk_urls = browser_urls[i:i + chunk_size]
+            chunk_results = await scrape_tiktok_chunk(chunk_urls, contexts, budget, i, args.profiler, breaker)
+            all_results.extend(chunk_results)
+            total_completed += len(chunk_results)
+
+            await contexts.retire_challenged()
+            if watchdog.over_limit():
+                browser, contexts = await recycle_browser(p, browser, contexts, watchdog, args)
+        
+        stop = time.time()
+        unavailable = sum(1 for r in all_results if r.status not in ("ok", "failed", "challenged"))
+        if unavailable:
+            print(f"{Colors.GRAY}  [Skipped {unavailable:,} unavailable (deleted/private/age-gated/region-blocked)]{Colors.RESET}", flush=True)
+        challenged = sum(1 for r in all_results if r.status == "challenged")
+        if challenged:
+            print(f"{Colors.GRAY}  [{challenged:,} challenged (status 'challenged'), breaker tripped {breaker.trips} time(s)]{Colors.RESET}", flush=True)
+        if budget.samples:
+            log(f"Per-URL latency p95 {budget.p95():.1f}s, deadline settled at {budget.seconds():.1f}s")
+        if watchdog.recycles:
+            log(watchdog.report())
+            print(f"{Colors.GRAY}  [{watchdog.report()}]{Colors.RESET}", flush=True)
+        if contexts.retired:
+            log(f"Retired {contexts.retired} challenged browser contexts")
+            print(f"{Colors.GRAY}  [Retired {contexts.retired} challenged browser contexts]{Colors.RESET}", flush=True)
+        if args.static_cache:
+            log(args.static_cache.report())
+            print(f"{Colors.GRAY}  [{args.static_cache.report()}]{Colors.RESET}", flush=True)
+
+        save_outputs(all_results, args)
+
+        print(f"\n{Colors.GREEN} Completed  {n:,} TikToks in {time_taken(start, stop)}.{Colors.RESET}", flush=True)
+
+        # comments run last so they never hold up metadata
+        if args.max_comments:
+            await bulk_tiktok_comments([r.link for r in all_results if r.status == "ok"], contexts, args, breaker)
+
+        await browser.close()
+
+async def harvest_profile(handle: str, page, limit: int = 0, idle_rounds: int = 3,
+                          deadline: Deadline | None = None) -> Tuple[List[TiktokMetadata], List[str]]:
+    """
+    Scroll one profile grid, building metadata from the item_list responses. Returns
+    (metadata, video URLs seen in the grid but missing from the captured responses).
+    `deadline` bounds navigation and the wait for the grid; the scrolling is bounded by `idle_rounds`.
+    """
+    deadline = deadline or LatencyBudget().start()
+    capture = ItemListCapture(page)
+    await page.goto(f"https://www.tiktok.com/@{handle}", timeout=deadline.remaining_ms(0.6))
+    page.set_default_timeout(deadline.remaining_ms())
+    if await page_challenged(page):
+        log(f"Challenged on profile @{handle}")
+        return [], []
+    grid = page.locator('div[data-e2e="user-post-item"] a[href*="/video/"]')
+    try:
+        await grid.first.wait_for(state="visible", timeout=min(15000, deadline.remaining_ms()))
+    except Exception:
+        log(f"No videos on profile @{handle}")
+        return [], []
+
+    idle = 0
+    while idle < idle_rounds and capture.has_more and not (limit and len(capture.items) >= limit):
+        seen = await grid.count()
+        await grid.last.scroll_into_view_if_needed()
+        await page.mouse.wheel(0, 3000)
+        idle = 0 if await wait_for_growth(grid, seen, 3.0) else idle + 1
+        await capture.settle()
+    await capture.settle()
+
+    items = list(capture.items.values())
+    links = [link.split("?")[0] for link in await grid.evaluate_all("els => els.map(el => el.href)")]
+    missing = [link for link in dict.fromkeys(links) if link not in capture.items]
+    if limit:
+        items, missing = items[:limit], missing[:max(0, limit - len(items))]
+    return items, missing
+
+async def harvest_profiles(handles: List[str], args: argparse.Namespace) -> None:
+    """
+    Profile mode: one scrolled profile page yields the metadata of every video on it. Videos
+    whose stats were not in a captured response are scraped one by one as usual.
+    """
+    print(f"{Colors.CYAN}Harvesting {len(handles)} TikTok profiles...{Colors.RESET}", flush=True)
+    all_results: List[TiktokMetadata] = []
+    missing: List[str] = []
+    start = time.time()
 
-            # Process chunk with live progress
-            chunk_results: List[TiktokMetadata] = []
-            completed = 0
+    async with async_playwright() as p:
+        browser = await launch_browser(p, args.launch_profile)
+        contexts = await open_contexts(browser, args)
+        semaphore = asyncio.Semaphore(len(contexts))
+        budget = LatencyBudget(ceiling=args.deadline)
 
-            for coro in asyncio.as_completed(tasks):
+        async def worker(i: int, handle: str) -> None:
+            async with semaphore:
+                page = await contexts[i % len(contexts)].new_page()
                 try:
-                    result = await coro
-                    chunk_results.append(result)
+                    await Stealth().apply_stealth_async(page)
+                    items, rest = await harvest_profile(handle, page, args.max_videos, deadline=budget.start())
                 except Exception as e:
-                    print(f"\nTask failed: {e}", flush=True)
-                completed += 1
-            
-            await asyncio.gather(*[page.close() for page in pages], return_exceptions=True)
-            all_results.extend(chunk_results)
-            total_completed += completed
-        
+                    log(f"Failed to harvest profile @{handle}: {e}")
+                    items, rest = [], []
+                finally:
+                    await page.close()
+            all_results.extend(items)
+            missing.extend(rest)
+            print(f"{Colors.GRAY}  [@{handle}: {len(items):,} from the item list, {len(rest):,} to open]{Colors.RESET}", flush=True)
+
+        await asyncio.gather(*(worker(i, handle) for i, handle in enumerate(handles)))
+
+        budget = LatencyBudget(ceiling=args.deadline)
+        breaker = CircuitBreaker(SITE, args.challenge_threshold, args.cooldown)
+        chunk_size = optimal_chunk_size(len(missing))
+        for i in range(0, len(missing), chunk_size):
+            all_results += await scrape_tiktok_chunk(missing[i:i + chunk_size], contexts, budget, i, args.profiler, breaker)
+            await contexts.retire_challenged()
         stop = time.time()
-        
-    if args.csv:
-        save_tiktok_metadata_csv(all_results, args.csv)
-        print(f"{Colors.GRAY}  [Saved CSV to: {args.csv}]{Colors.RESET}", flush=True)
-    if args.json:
-        save_tiktok_metadata_json(all_results, args.json)
-        print(f"{Colors.GRAY}  [Saved JSON to: {args.json}]{Colors.RESET}", flush=True)
+        await browser.close()
 
-    print(f"\n{Colors.GREEN} Completed  {n:,} TikToks in {time_taken(start, stop)}.{Colors.RESET}", flush=True)
+    save_outputs(all_results, args)
+    print(f"\n{Colors.GREEN} Completed  {len(all_results):,} TikToks from {len(handles)} profiles in "
+          f"{time_taken(start, stop)}.{Colors.RESET}", flush=True)
 
-    await browser.close()
+async def refresh_corpus(args: argparse.Namespace) -> None:
+    """
+    Scheduler mode: every REFRESH_CYCLE seconds, send the most overdue items of the --sqlite
+    corpus through the regular bulk path, never more than --refresh URLs per hour.
+    """
+    scheduler = RefreshScheduler(open_snapshot_db(args.sqlite), video_id_from_url, posted_at, "item_id")
+    if args.read:
+        added = scheduler.add(list(load_links(args.read)))
+        print(f"{Colors.GRAY}  [Added {added:,} new URLs to {args.sqlite}]{Colors.RESET}", flush=True)
+    batch = max(1, math.ceil(args.refresh * REFRESH_CYCLE / 3600))
+    rounds = 0
+    while True:
+        started = time.time()
+        urls = scheduler.due(batch)
+        rounds += 1
+        log(f"Refresh round {rounds}: {len(urls)} due (budget {batch})")
+        if urls:
+            await bulk_tiktok_metadata(set(urls), args)
+        else:
+            print(f"{Colors.GRAY}  [Refresh round {rounds}: nothing due]{Colors.RESET}", flush=True)
+        if args.cycles and rounds >= args.cycles:
+            break
+        await asyncio.sleep(max(0.0, REFRESH_CYCLE - (time.time() - started)))
 
 async def single_tiktok_metadata(url: str, args: argparse.Namespace) -> TiktokMetadata:
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-        start = time.time()
-        await Stealth().apply_stealth_async(page)
-        metadata = await fetch_tiktok_metadata(url, page)
-        stop = time.time()
-        await browser.close() #close browser
+    start = time.time()
+    metadata = None
+    if args.http:
+        results, _, stats = await http_tiktok_metadata([url], args)
+        metadata = results[0] if results else None
+        print(f"{Colors.GRAY}  [{stats.report()}]{Colors.RESET}", flush=True)
+    stop = time.time()
 
-    if args.csv:
-        save_tiktok_metadata_csv([metadata], args.csv)
-        print(f"{Colors.GRAY}  [Saved CSV to: {args.csv}]{Colors.RESET}", flush=True)
-    
-    if args.json:
-        save_tiktok_metadata_json([metadata], args.json)
-        print(f"{Colors.GRAY}  [Saved JSON to: {args.json}]{Colors.RESET}", flush=True)
+    # Chromium only starts when the HTTP path missed or comments were asked for
+    if metadata is None or (args.max_comments and metadata.status == "ok"):
+        async with async_playwright() as p:
+            browser = await launch_browser(p, args.launch_profile)
+            if metadata is None:
+                context = await new_context(browser, args, storage_state_for(args, 0))
+                page = await context.new_page()
+                await Stealth().apply_stealth_async(page)
+                metadata = await fetch_tiktok_metadata(url, page)
+                stop = time.time()
+            if args.max_comments and metadata.status == "ok":
+                await bulk_tiktok_comments([url], await ContextPool(browser, args).open(1), args)
+            await browser.close() #close browser
+
+    save_outputs([metadata], args)
     
     print(f"\n{Colors.GREEN}Completed in {time_taken(start, stop)}.{Colors.RESET}", flush=True)
 
 
-
-
 def parse_args():
     parser = argparse.ArgumentParser(
         description="Fetch metadata from TikTok URLs and export to CSV/JSON."
@@ -293,18 +796,262 @@ def parse_args():
         metavar="FILE",
         help="Export to JSON. If no FILE given, use --output or default 'output.json'."
     )
+    parser.add_argument(
+        "--sqlite",
+        nargs="?",
+        const=True,
+        metavar="FILE",
+        help="Append a snapshot of every item's counts to a SQLite database. If no FILE given, use --output or default 'output.db'."
+    )
+
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        type=int,
+        const=10,
+        metavar="N",
+        help="Profile the run and keep Playwright traces for the slowest N URLs (default 10) and any "
+             "failures. The report is written to '<output>.profile/'."
+    )
+
+    # Distributed work queue
+    parser.add_argument(
+        "--serve",
+        metavar="HOST:PORT",
+        help="Run as coordinator: queue the --read URLs and hand them out to --worker processes."
+    )
+    parser.add_argument(
+        "--worker",
+        metavar="HOST:PORT",
+        help="Run as worker: lease URL batches from the coordinator at HOST:PORT until the queue is done."
+    )
+    parser.add_argument(
+        "--queue-db",
+        type=Path,
+        default=Path("queue.db"),
+        metavar="FILE",
+        help="SQLite file backing the coordinator queue; reusing it resumes a run (default: queue.db)."
+    )
+    parser.add_argument(
+        "--lease",
+        type=float,
+        default=300.0,
+        metavar="SECONDS",
+        help="Coordinator lease length; unfinished batches are re-queued after it expires (default: 300)."
+    )
+
+    # Profile harvest
+    parser.add_argument(
+        "--authors",
+        nargs="+",
+        metavar="HANDLE",
+        help="Harvest every video of these profiles (@name, name or profile URL) from the profile grid."
+    )
+    parser.add_argument(
+        "--max-videos",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Stop each --authors profile after N videos (default: all)."
+    )
+
+    # Recurring refresh of a tracked corpus
+    parser.add_argument(
+        "--refresh",
+        type=int,
+        metavar="URLS_PER_HOUR",
+        help="Scheduler mode: keep re-scraping the --sqlite corpus (plus any --read URLs), fresh and "
+             "fast-growing items first, at most URLS_PER_HOUR."
+    )
+    parser.add_argument(
+        "--cycles",
+        type=int,
+        default=0,
+        metavar="N",
+        help=f"Stop --refresh after N rounds of {REFRESH_CYCLE // 60} minutes (default: run until interrupted)."
+    )
+
+    # Shared static asset cache
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        metavar="DIR",
+        help="Serve JS/CSS/font responses from an on-disk cache in DIR, shared by all contexts and later runs."
+    )
+    parser.add_argument(
+        "--cache-mb",
+        type=int,
+        default=512,
+        metavar="MB",
+        help="Size cap for --cache-dir; least recently used entries are evicted past it (default: 512)."
+    )
+
+    # Challenge circuit breaker
+    parser.add_argument(
+        "--challenge-threshold",
+        type=float,
+        default=0.5,
+        metavar="FRACTION",
+        help="Pause dispatching once this share of the last 20 pages hit a challenge (default: 0.5)."
+    )
+    parser.add_argument(
+        "--cooldown",
+        type=float,
+        default=300.0,
+        metavar="SECONDS",
+        help="Pause before a single probe page once the breaker trips; doubles while probes are "
+             "challenged (default: 300)."
+    )
+
+    # Storage state (consent/cookies) handling
+    parser.add_argument(
+        "--contexts",
+        type=int,
+        default=4,
+        metavar="N",
+        help="Isolated browser identities (user agent, locale, timezone, viewport, cookies) to spread "
+             "pages across; challenged ones are replaced (default: 4)."
+    )
+    parser.add_argument(
+        "--state",
+        type=Path,
+        nargs="+",
+        metavar="FILE",
+        help="Saved Playwright storage state(s) to start contexts from; several are rotated."
+    )
+    parser.add_argument(
+        "--warm-up",
+        type=Path,
+        nargs="+",
+        metavar="FILE",
+        help="Create storage state file(s) past the consent/cookie interstitial, then exit."
+    )
+    parser.add_argument(
+        "--launch-profile",
+        choices=list(LAUNCH_PROFILES),
+        default="default",
+        help="Chromium launch flags: 'default' (Playwright's), 'lean' (no GPU/compositing, no autoplay), "
+             "'minimal' (lean without images) or 'new-headless' (lean on the full Chromium build)."
+    )
+    parser.add_argument(
+        "--benchmark",
+        type=Path,
+        metavar="DIR",
+        help="Compare pages/sec and RSS of every --launch-profile on the saved .html pages in DIR, then exit."
+    )
+    parser.add_argument(
+        "--benchmark-loads",
+        type=int,
+        default=200,
+        metavar="N",
+        help="Page loads per launch profile for --benchmark (default: 200)."
+    )
+
+    # Browserless fast path
+    parser.add_argument(
+        "--http",
+        action="store_true",
+        help="Fetch pages over plain HTTP first and only open a browser when parsing fails (needs httpx)."
+    )
+    parser.add_argument(
+        "--http-connections",
+        type=int,
+        default=16,
+        metavar="N",
+        help="Maximum pooled HTTP connections for --http (default: 16)."
+    )
+
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=60.0,
+        metavar="SECONDS",
+        help="Upper bound on the total time per URL, retries included. The actual budget adapts "
+             "to 3x the running p95 latency (default: 60)."
+    )
+    parser.add_argument(
+        "--max-browser-mb",
+        type=int,
+        default=int(psutil.virtual_memory().total / (1024 ** 2) // 2),
+        metavar="MB",
+        help="Recycle browser contexts (or restart Chromium) when its processes exceed MB of RSS "
+             "(default: half of system RAM, 0 disables)."
+    )
+
+    parser.add_argument(
+        "--pretty",
+        action="store_true",
+        help="Indent JSON output. By default it is written compact; .gz/.zst filenames are compressed."
+    )
+
+    # Optional comment stage
+    parser.add_argument(
+        "--max-comments",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Harvest up to N top-level comments per video (disabled by default)."
+    )
+    parser.add_argument(
+        "--comments",
+        type=Path,
+        metavar="FILE",
+        help="JSONL file for harvested comments. Defaults to '<output>.comments.jsonl'."
+    )
 
     args = parser.parse_args()
 
+    if args.warm_up:
+        return args
+    if args.benchmark:
+        if not args.benchmark.is_dir():
+            parser.error(f"Fixture directory '{args.benchmark}' not found.")
+        if args.benchmark_loads <= 0:
+            parser.error("--benchmark-loads must be a positive number.")
+        return args
+
+    if args.cache_mb <= 0:
+        parser.error("--cache-mb must be a positive number.")
+    if args.contexts <= 0:
+        parser.error("--contexts must be a positive number.")
+    if not 0 < args.challenge_threshold <= 1:
+        parser.error("--challenge-threshold must be between 0 and 1.")
+
+    for state in args.state or []:
+        if not state.is_file():
+            parser.error(f"Storage state '{state}' not found. Create it with --warm-up.")
+
+    if args.serve and args.worker:
+        parser.error("Specify either --serve or --worker, not both.")
+    if args.worker:
+        return args  # workers take URLs from the coordinator and write no files
+    if args.serve and not args.read:
+        parser.error("--serve needs --read FILE to fill the queue.")
+
+    if args.authors:
+        if args.link or args.read or args.serve or args.refresh:
+            parser.error("--authors cannot be combined with LINK, --read, --serve or --refresh.")
+        if args.max_videos < 0:
+            parser.error("--max-videos must be a positive number.")
+        args.authors = list(dict.fromkeys(handle_from(handle) for handle in args.authors))
+
+    if args.refresh is not None:
+        if args.refresh <= 0:
+            parser.error("--refresh must be a positive number of URLs per hour.")
+        if not args.sqlite:
+            parser.error("--refresh needs --sqlite FILE holding the tracked corpus.")
+        if args.link or args.serve:
+            parser.error("--refresh takes its URLs from --sqlite (and --read), not a LINK or --serve.")
+
     # Validation: require input
-    if not args.link and not args.read:
-        parser.error("Either a LINK or --read FILE must be provided.")
+    if not (args.link or args.read or args.refresh or args.authors):
+        parser.error("Either a LINK, --read FILE or --authors must be provided.")
     if args.link and args.read:
         parser.error("Specify either a LINK or --read FILE, not both.")
 
     # Validation: require at least one output format
-    if not (args.csv or args.json):
-        parser.error("At least one output format (--csv or --json) is required.")
+    if not (args.csv or args.json or args.sqlite):
+        parser.error("At least one output format (--csv, --json or --sqlite) is required.")
 
     # If --csv/--json used *without* filename (i.e., const=True), derive path
     if args.csv is True:
@@ -319,19 +1066,55 @@ def parse_args():
     elif args.json:
         args.json = Path(args.json)
 
+    if args.sqlite is True:
+        base = args.output or "output"
+        args.sqlite = Path(f"{base}.db")
+    elif args.sqlite:
+        args.sqlite = Path(args.sqlite)
+
+    if args.max_comments < 0:
+        parser.error("--max-comments must be a positive number.")
+    if args.max_comments and not args.comments:
+        args.comments = Path(f"{args.output or 'output'}.comments.jsonl")
+
     return args
 
 
 async def main():
+    scrape_common.LOG_FILE = "tiktok.log"
     args = parse_args()
-    if args.link:
+    args.profiler = RunProfiler(profile_dir(args), args.profile) if args.profile else None
+    args.static_cache = StaticCache(args.cache_dir, args.cache_mb) if args.cache_dir else None
+    if args.profiler:
+        args.profiler.profile.enable()
+    try:
+        await run(args)
+    finally:
+        if args.profiler:
+            args.profiler.profile.disable()
+            report = args.profiler.write_report()
+            print(f"{Colors.GRAY}  [Saved profile report to: {report}]{Colors.RESET}", flush=True)
+
+async def run(args: argparse.Namespace) -> None:
+    if args.benchmark:
+        await benchmark_profiles(args.benchmark, args.benchmark_loads, list(LAUNCH_PROFILES),
+                                 optimal_chunk_size(args.benchmark_loads))
+    elif args.warm_up:
+        await warm_up_storage_state(args.warm_up, args.launch_profile)
+    elif args.worker:
+        await run_worker(args, SITE, http_tiktok_metadata, scrape_tiktok_chunk, optimal_chunk_size(10_000), "TikToks")
+    elif args.serve:
+        await serve_queue(list(load_links(args.read)), args, TiktokMetadata, save_outputs, "TikToks")
+    elif args.refresh:
+        await refresh_corpus(args)
+    elif args.authors:
+        await harvest_profiles(args.authors, args)
+    elif args.link:
         await single_tiktok_metadata(args.link, args)
     elif args.read:
         urls = load_links(args.read)
         await bulk_tiktok_metadata(urls, args)
 
 
-
-
 if __name__ == "__main__":
     asyncio.run(main())
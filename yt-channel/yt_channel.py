@@ -1,10 +1,35 @@
-import asyncio, argparse, sys, math, random, time, re
+import asyncio, argparse, sys, random, time, re, hashlib, mimetypes
+from importlib.util import find_spec
+from itertools import cycle
+from datetime import datetime, timedelta
+import cProfile, pstats, io, json, textwrap
 from pathlib import Path
 from playwright.async_api import async_playwright
 from dataclasses import dataclass, fields
 from typing import List, Set, Tuple, Dict
 
+try:
+    import orjson  # optional: faster JSON encoding
+except ImportError:
+    orjson = None
+
+try:
+    import httpx  # optional: asset downloads (--assets)
+except ImportError:
+    httpx = None
+
+# launch, cache, output and YouTube payload helpers shared with the other tools
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "common"))
+from scrape_common import (
+    BROWSE_API, LAUNCH_PROFILES, api_text, Colors, Deadline, dig, encode_json, find_renderers,
+    LatencyBudget, launch_browser, open_output, StaticCache,
+)
+
 BATCH = 20
+ASSET_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
+    "Accept": "image/avif,image/webp,image/*,*/*;q=0.8",
+}
 
 @dataclass
 class ChannelMetaData:
@@ -34,13 +59,6 @@ class ChannelTabs:
     podcasts: int | None
 
 
-class Colors:
-    RESET = "\033[0m"
-    GREEN = "\033[32m"
-    CYAN = "\033[36m"
-    BLUE = "\033[34m"
-    GRAY = "\033[90m"
-
 def to_int(value) -> int:
     if isinstance(value, (int, float)):
         return int(value)
@@ -53,14 +71,35 @@ def to_int(value) -> int:
         return int(float(v[:-1]) * 1_000_000_000)
     return int(float(v))
 
-def save_meta_data_json(meta_data: ChannelMetaData, file: Path):
-    import json
-    with open(file, 'w', encoding='utf-8') as f:
-        json.dump(meta_data.__dict__, f, ensure_ascii=False, indent=4)
+def save_meta_data_json(meta_data: ChannelMetaData, file: Path, pretty: bool = False):
+    """
+    Write the channel object field by field, streaming the tab lists one item at a time.
+    """
+    pad = "\n    " if pretty else ""
+    with open_output(file) as f:
+        f.write(b"{")
+        for i, (key, value) in enumerate(meta_data.__dict__.items()):
+            f.write((("," if i else "") + pad + json.dumps(key) + (": " if pretty else ":")).encode("utf-8"))
+            if not isinstance(value, list) or not value:
+                f.write(textwrap.indent(encode_json(value, pretty).decode("utf-8"), "    ").lstrip().encode("utf-8"))
+                continue
+            f.write(b"[")
+            for j, item in enumerate(value):
+                if j:
+                    f.write(b",")
+                if pretty:
+                    f.write(b"\n" + textwrap.indent(encode_json(item, pretty).decode("utf-8"), " " * 8).encode("utf-8"))
+                else:
+                    f.write(encode_json(item))
+            f.write(b"\n    ]" if pretty else b"]")
+        f.write(b"\n}" if pretty else b"}")
     print(f"{Colors.GREEN}Saved metadata to {file}{Colors.RESET}")
 
-async def channel_data(url: str, page) -> Tuple[ChannelMetaData, ChannelTabs]:
-    await page.goto(url, timeout=60000)
+async def channel_data(url: str, page, deadline: Deadline | None = None) -> Tuple[ChannelMetaData, ChannelTabs]:
+    deadline = deadline or LatencyBudget().start()
+    # navigation gets most of what is left; selector waits share the rest
+    await page.goto(url, timeout=deadline.remaining_ms(0.6))
+    page.set_default_timeout(deadline.remaining_ms())
     more_info_btn = page.locator("button[class*='yt-truncated-text__absolute-button']")
     if await more_info_btn.count() > 0:
         await more_info_btn.click()
@@ -248,25 +287,211 @@ async def extract_podcast_data(target) -> dict:
     return dict(data)
 
 
+def parse_api_videos(payload: dict) -> List[Dict[str, str]]:
+    videos = []
+    for r in find_renderers(payload, "videoRenderer"):
+        if not r.get("videoId"):
+            continue
+        views = api_text(r.get("viewCountText")) or ""
+        videos.append({
+            "title": api_text(r.get("title")),
+            "link": f"https://www.youtube.com/watch?v={r['videoId']}",
+            "thumbnail": dig(r, "thumbnail", "thumbnails", -1, "url"),
+            "duration": api_text(r.get("lengthText")),
+            "views": views.replace(" views", "") or None,
+            "published": api_text(r.get("publishedTimeText")),
+        })
+    return videos
+
+def parse_api_live_streams(payload: dict) -> List[Dict[str, str]]:
+    live_streams = []
+    for video in parse_api_videos(payload):
+        video.pop("views")
+        if video["title"]:
+            video["title"] = video["title"].replace(" [LIVE]", "")
+        if video["published"]:
+            video["published"] = re.sub(r"^Streamed\s*", "", video["published"], flags=re.I)
+        live_streams.append(video)
+    return live_streams
+
+def parse_api_shorts(payload: dict) -> List[Dict[str, str]]:
+    shorts = []
+    for r in find_renderers(payload, "shortsLockupViewModel"):
+        video_id = dig(r, "onTap", "innertubeCommand", "reelWatchEndpoint", "videoId")
+        if not video_id:
+            continue
+        views = dig(r, "overlayMetadata", "secondaryText", "content") or ""
+        shorts.append({
+            "title": dig(r, "overlayMetadata", "primaryText", "content"),
+            "link": f"https://www.youtube.com/shorts/{video_id}",
+            "thumbnail": dig(r, "thumbnail", "sources", 0, "url"),
+            "views": views.replace(" views", "") or None,
+        })
+    # older layout still served to some clients
+    for r in find_renderers(payload, "reelItemRenderer"):
+        if not r.get("videoId"):
+            continue
+        views = api_text(r.get("viewCountText")) or ""
+        shorts.append({
+            "title": api_text(r.get("headline")),
+            "link": f"https://www.youtube.com/shorts/{r['videoId']}",
+            "thumbnail": dig(r, "thumbnail", "thumbnails", -1, "url"),
+            "views": views.replace(" views", "") or None,
+        })
+    return shorts
+
+def parse_api_playlists(payload: dict) -> List[Dict[str, str]]:
+    playlists = []
+    for r in find_renderers(payload, "lockupViewModel"):
+        if r.get("contentType") != "LOCKUP_CONTENT_TYPE_PLAYLIST" or not r.get("contentId"):
+            continue
+        badge = next(find_renderers(r.get("contentImage"), "thumbnailBadgeViewModel"), None)
+        playlists.append({
+            "title": dig(r, "metadata", "lockupMetadataViewModel", "title", "content"),
+            "link": f"https://www.youtube.com/playlist?list={r['contentId']}",
+            "thumbnail": dig(r, "contentImage", "collectionThumbnailViewModel", "primaryThumbnail",
+                             "thumbnailViewModel", "image", "sources", 0, "url"),
+            "badge": badge.get("text") if badge else None,
+        })
+    return playlists
+
+def parse_api_playlist_videos(payload: dict) -> List[Dict[str, str]]:
+    videos = []
+    for r in find_renderers(payload, "playlistVideoRenderer"):
+        if not r.get("videoId"):
+            continue
+        videos.append({
+            "title": api_text(r.get("title")),
+            "link": f"https://www.youtube.com/watch?v={r['videoId']}",
+            "thumbnail": dig(r, "thumbnail", "thumbnails", -1, "url"),
+            "duration": api_text(r.get("lengthText")),
+        })
+    # lockup layout served to some clients
+    for r in find_renderers(payload, "lockupViewModel"):
+        if r.get("contentType") != "LOCKUP_CONTENT_TYPE_VIDEO" or not r.get("contentId"):
+            continue
+        badge = next(find_renderers(r.get("contentImage"), "thumbnailBadgeViewModel"), None)
+        videos.append({
+            "title": dig(r, "metadata", "lockupMetadataViewModel", "title", "content"),
+            "link": f"https://www.youtube.com/watch?v={r['contentId']}",
+            "thumbnail": dig(r, "contentImage", "thumbnailViewModel", "image", "sources", 0, "url"),
+            "duration": badge.get("text") if badge else None,
+        })
+    return videos
+
+class BrowseCapture:
+    """
+    Collects items from the browse/continuation API responses a tab fires while it is scrolled,
+    so the item lists can be built from JSON instead of the rendered DOM.
+    """
+    def __init__(self, page, parser):
+        self.parser = parser
+        self.items: Dict[str, Dict[str, str]] = {}  # link -> item, insertion ordered
+        self.pending: Set[asyncio.Task] = set()
+        page.on("response", self.on_response)
+
+    def on_response(self, response) -> None:
+        if BROWSE_API in response.url and response.ok:
+            task = asyncio.ensure_future(self.consume(response))
+            self.pending.add(task)
+            task.add_done_callback(self.pending.discard)
+
+    async def consume(self, response) -> None:
+        try:
+            payload = await response.json()
+        except Exception:
+            return  # body evicted or not JSON; DOM fallback covers it
+        for item in self.parser(payload):
+            self.items.setdefault(item["link"], item)
+
+    async def collect(self) -> List[Dict[str, str]]:
+        if self.pending:
+            await asyncio.gather(*self.pending, return_exceptions=True)
+        return list(self.items.values())
+
+SPINNER = "div[class*='circle-clipper left style-scope tp-yt-paper-spinner']"
+TAB_NAMES = ("videos", "shorts", "live", "playlists", "podcasts")
+RELATIVE_UNITS = {
+    "second": 1, "minute": 60, "hour": 3600, "day": 86400,
+    "week": 7 * 86400, "month": 30 * 86400, "year": 365 * 86400,
+}
+
+def published_to_date(text: str | None, now: datetime | None = None) -> datetime | None:
+    """
+    Turn a relative "published" string ("3 weeks ago", "Streamed 2 days ago") into an
+    approximate datetime. Returns None when the text has no relative age in it.
+    """
+    match = re.search(r"(\d+)\s+(second|minute|hour|day|week|month|year)s?\s+ago", text or "", re.I)
+    if not match:
+        return None
+    age = int(match.group(1)) * RELATIVE_UNITS[match.group(2).lower()]
+    return (now or datetime.now()) - timedelta(seconds=age)
 
-async def pull_videos(url, page, tab_index: int) -> List[Dict[str, str]]:
+def parse_since(value: str) -> datetime:
+    """
+    Accept either an ISO date (2024-05-01) or a relative age ("30 days", "3 weeks ago").
+    """
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        cutoff = published_to_date(value if "ago" in value else f"{value} ago")
+        if cutoff is None:
+            raise ValueError(f"unrecognised date {value!r}")
+        return cutoff
+
+def apply_limits(items: List[Dict[str, str]], limit: int | None, since: datetime | None) -> List[Dict[str, str]]:
+    if since:
+        # undated items (e.g. upcoming streams) are kept
+        items = [item for item in items
+                 if (published := published_to_date(item.get("published"))) is None or published >= since]
+    return items[:limit] if limit else items
+
+async def scroll_tab(page, containers, capture=None, limit: int | None = None, since: datetime | None = None) -> None:
+    """
+    Keep scrolling until the loading spinner is gone, or stop early once `limit` items are
+    loaded or the oldest loaded item was published before `since`.
+    """
+    await page.mouse.wheel(0, 7000)
+    last_spin = True
+    while last_spin:
+        await page.mouse.wheel(0, 2500)
+        last_spin = await page.locator(SPINNER).nth(1).is_visible()
+        await asyncio.sleep(0.5)
+        if not (limit or since):
+            continue
+
+        if capture:
+            loaded = list(capture.items.values())
+            count = len(loaded)
+            oldest = loaded[-1].get("published") if loaded else None
+        else:
+            count = await containers.count()
+            oldest = await containers.nth(count - 1).inner_text() if count and since else None
+        if limit and count >= limit:
+            break
+        if since and (published := published_to_date(oldest)) and published < since:
+            break
+
+async def pull_videos(url, page, tab_index: int, api_capture: bool = True,
+                      limit: int | None = None, since: datetime | None = None) -> List[Dict[str, str]]:
     await page.goto(url)
+    capture = BrowseCapture(page, parse_api_videos) if api_capture else None
     tabs = page.locator("div[class='tabGroupShapeTabs']")
-    last_spin = True
     # navigate to videos tab
     await tabs.locator('.yt-tab-shape.yt-tab-shape--host-clickable').nth(tab_index).click()
     await asyncio.sleep(2)
-    await page.mouse.wheel(0, 7000)
-    
-    # continuous scrolling till all videos are loaded
-    while last_spin:
-        await page.mouse.wheel(0, 2500)
-        last_spin = await page.locator("div[class*='circle-clipper left style-scope tp-yt-paper-spinner']").nth(1).is_visible()
-        await asyncio.sleep(0.5)
+    containers = page.locator("div[class*='style-scope ytd-rich-item-renderer']")
+    await scroll_tab(page, containers, capture, limit, since)
+
+    if capture:
+        captured = await capture.collect()
+        if captured:
+            return apply_limits(captured, limit, since)
 
     videos = []
-    containers = page.locator("div[class*='style-scope ytd-rich-item-renderer']")
     size = await containers.count()
+    if limit:
+        size = min(size, limit)
 
     for start in range(0, size, BATCH):
         tasks = []
@@ -278,26 +503,28 @@ async def pull_videos(url, page, tab_index: int) -> List[Dict[str, str]]:
             if isinstance(r, dict):
                 videos.append(r)
     
-    return videos
+    return apply_limits(videos, limit, since)
 
-async def pull_shorts(url, page, tab_index: int) -> List[Dict[str, str]]:
+async def pull_shorts(url, page, tab_index: int, api_capture: bool = True,
+                      limit: int | None = None, since: datetime | None = None) -> List[Dict[str, str]]:
     await page.goto(url)
+    capture = BrowseCapture(page, parse_api_shorts) if api_capture else None
     tabs = page.locator("div[class='tabGroupShapeTabs']")
-    last_spin = True
     # navigate to shorts tab
     await tabs.locator('.yt-tab-shape.yt-tab-shape--host-clickable').nth(tab_index).click()
     await asyncio.sleep(2)
-    await page.mouse.wheel(0, 7000)
-    
-    # continuous scrolling till all shorts are loaded
-    while last_spin:
-        await page.mouse.wheel(0, 2500)
-        last_spin = await page.locator("div[class*='circle-clipper left style-scope tp-yt-paper-spinner']").nth(1).is_visible()
-        await asyncio.sleep(0.5)
+    containers = page.locator("div[class*='style-scope ytd-rich-item-renderer']")
+    await scroll_tab(page, containers, capture, limit, since)
+
+    if capture:
+        captured = await capture.collect()
+        if captured:
+            return apply_limits(captured, limit, since)
 
     shorts = []
-    containers = page.locator("div[class*='style-scope ytd-rich-item-renderer']")
     size = await containers.count()
+    if limit:
+        size = min(size, limit)
 
     for start in range(0, size, BATCH):
         tasks = []
@@ -309,26 +536,28 @@ async def pull_shorts(url, page, tab_index: int) -> List[Dict[str, str]]:
             if isinstance(r, dict):
                 shorts.append(r)
 
-    return shorts
+    return apply_limits(shorts, limit, since)
 
-async def pull_live_streams(url, page, tab_index: int) -> List[Dict[str, str]]:
+async def pull_live_streams(url, page, tab_index: int, api_capture: bool = True,
+                            limit: int | None = None, since: datetime | None = None) -> List[Dict[str, str]]:
     await page.goto(url)
+    capture = BrowseCapture(page, parse_api_live_streams) if api_capture else None
     tabs = page.locator("div[class='tabGroupShapeTabs']")
-    last_spin = True
     # navigate to live tab
     await tabs.locator('.yt-tab-shape.yt-tab-shape--host-clickable').nth(tab_index).click()
     await asyncio.sleep(2)
-    await page.mouse.wheel(0, 7000)
-    
-    # continuous scrolling till all shorts are loaded
-    while last_spin:
-        await page.mouse.wheel(0, 2500)
-        last_spin = await page.locator("div[class*='circle-clipper left style-scope tp-yt-paper-spinner']").nth(1).is_visible()
-        await asyncio.sleep(0.5)
+    containers = page.locator("div.style-scope.ytd-rich-item-renderer")
+    await scroll_tab(page, containers, capture, limit, since)
+
+    if capture:
+        captured = await capture.collect()
+        if captured:
+            return apply_limits(captured, limit, since)
 
     live_streams = []
-    containers = page.locator("div.style-scope.ytd-rich-item-renderer")
     size = await containers.count()
+    if limit:
+        size = min(size, limit)
 
     for start in range(0, size, BATCH):
         tasks = []
@@ -340,26 +569,28 @@ async def pull_live_streams(url, page, tab_index: int) -> List[Dict[str, str]]:
             if isinstance(r, dict):
                 live_streams.append(r)
 
-    return live_streams
+    return apply_limits(live_streams, limit, since)
     
-async def pull_playlists(url, page, tab_index: int) -> List[Dict[str, str]]:
+async def pull_playlists(url, page, tab_index: int, api_capture: bool = True,
+                         limit: int | None = None, since: datetime | None = None) -> List[Dict[str, str]]:
     await page.goto(url)
+    capture = BrowseCapture(page, parse_api_playlists) if api_capture else None
     tabs = page.locator("div[class='tabGroupShapeTabs']")
-    last_spin = True
     # navigate to playlists tab
     await tabs.locator('.yt-tab-shape.yt-tab-shape--host-clickable').nth(tab_index).click()
     await asyncio.sleep(2)
-    await page.mouse.wheel(0, 7000)
-    
-    # continuous scrolling till all shorts are loaded
-    while last_spin:
-        await page.mouse.wheel(0, 2500)
-        last_spin = await page.locator("div[class*='circle-clipper left style-scope tp-yt-paper-spinner']").nth(1).is_visible()
-        await asyncio.sleep(0.5)
+    containers = page.locator("div.yt-lockup-view-model.yt-lockup-view-model--vertical")
+    await scroll_tab(page, containers, capture, limit, since)
+
+    if capture:
+        captured = await capture.collect()
+        if captured:
+            return apply_limits(captured, limit, since)
     
     playlists = []
-    containers = page.locator("div.yt-lockup-view-model.yt-lockup-view-model--vertical")
     size = await containers.count()
+    if limit:
+        size = min(size, limit)
 
     for start in range(0, size, BATCH):
         tasks = []
@@ -371,26 +602,28 @@ async def pull_playlists(url, page, tab_index: int) -> List[Dict[str, str]]:
             if isinstance(r, dict):
                 playlists.append(r)
 
-    return playlists
+    return apply_limits(playlists, limit, since)
     
-async def pull_podcasts(url, page, tab_index: int) -> List[Dict[str, str]]:
+async def pull_podcasts(url, page, tab_index: int, api_capture: bool = True,
+                        limit: int | None = None, since: datetime | None = None) -> List[Dict[str, str]]:
     await page.goto(url)
+    capture = BrowseCapture(page, parse_api_playlists) if api_capture else None
     tabs = page.locator("div[class='tabGroupShapeTabs']")
-    last_spin = True
     # navigate to playlists tab
     await tabs.locator('.yt-tab-shape.yt-tab-shape--host-clickable').nth(tab_index).click()
     await asyncio.sleep(2)
-    await page.mouse.wheel(0, 7000)
-    
-    # continuous scrolling till all shorts are loaded
-    while last_spin:
-        await page.mouse.wheel(0, 2500)
-        last_spin = await page.locator("div[class*='circle-clipper left style-scope tp-yt-paper-spinner']").nth(1).is_visible()
-        await asyncio.sleep(0.5)
+    containers = page.locator("div.yt-lockup-view-model.yt-lockup-view-model--vertical")
+    await scroll_tab(page, containers, capture, limit, since)
+
+    if capture:
+        captured = await capture.collect()
+        if captured:
+            return apply_limits(captured, limit, since)
     
     playlists = []
-    containers = page.locator("div.yt-lockup-view-model.yt-lockup-view-model--vertical")
     size = await containers.count()
+    if limit:
+        size = min(size, limit)
 
     for start in range(0, size, BATCH):
         tasks = []
@@ -402,30 +635,304 @@ async def pull_podcasts(url, page, tab_index: int) -> List[Dict[str, str]]:
             if isinstance(r, dict):
                 playlists.append(r)
 
-    return playlists
+    return apply_limits(playlists, limit, since)
 
-async def scrape_with_context(browser, coro):
+class RunProfiler:
+    """
+    --profile support: cProfile over the whole asyncio run, per-tab timings, and a Playwright
+    trace per tab context. Only the traces of the slowest N tabs and failed tabs are kept.
+    """
+    def __init__(self, directory: Path, slowest: int):
+        self.directory = directory
+        self.slowest = slowest
+        self.profile = cProfile.Profile()
+        self.timings: List[Tuple[float, str, str, Path]] = []  # seconds, tab, status, trace
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def write_report(self) -> Path:
+        slowest = sorted(self.timings, reverse=True)[:self.slowest]
+        failed = [t for t in self.timings if t[2] == "failed"]
+        for t in self.timings:
+            if t not in slowest and t not in failed:
+                t[3].unlink(missing_ok=True)
+
+        self.profile.dump_stats(str(self.directory / "profile.prof"))
+        stats = io.StringIO()
+        pstats.Stats(self.profile, stream=stats).sort_stats("cumulative").print_stats(40)
+
+        lines = ["Tabs by time:"]
+        lines += [f"{t[0]:8.2f}s  {t[2]:<7} {t[1]}  [{t[3].name}]" for t in sorted(self.timings, reverse=True)]
+        lines += ["", "cProfile (cumulative, top 40):", stats.getvalue()]
+        report = self.directory / "summary.txt"
+        report.write_text("\n".join(lines), encoding="utf-8")
+        return report
+
+async def new_context(browser, storage_state: str | None = None, static_cache: StaticCache | None = None):
+    context = await browser.new_context(storage_state=storage_state)
+    if static_cache:
+        await static_cache.attach(context)
+    return context
+
+async def scrape_with_context(browser, coro, storage_state: str | None = None,
+                              profiler: RunProfiler | None = None, name: str = "tab",
+                              static_cache: StaticCache | None = None):
     """
     Utility to run a scraper in its own context/page.
     """
-    context = await browser.new_context()
+    context = await new_context(browser, storage_state, static_cache)
     page = await context.new_page()
+    if profiler:
+        await context.tracing.start(screenshots=True, snapshots=True)
+    started, status = time.monotonic(), "failed"
     try:
-        return await coro(page)
+        result = await coro(page)
+        status = "ok"
+        return result
     finally:
+        if profiler:
+            trace = profiler.directory / f"trace-{name}.zip"
+            await context.tracing.stop(path=str(trace))
+            profiler.timings.append((time.monotonic() - started, name, status, trace))
         await context.close()
 
-async def grab_channel_info(url: str) -> ChannelMetaData:
+class AssetStore:
+    """
+    Content-addressed image store. Every distinct file is written once, to
+    objects/<sha256[:2]>/<sha256><ext>, and manifest.jsonl maps each downloaded URL to its
+    object, so the same thumbnail served under different URLs is stored once and a rerun
+    only fetches the URLs that are not in the manifest yet.
+    """
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.manifest_path = directory / "manifest.jsonl"
+        (directory / "objects").mkdir(parents=True, exist_ok=True)
+        self.done: Dict[str, str] = {}  # url -> object path
+        if self.manifest_path.exists():
+            for line in self.manifest_path.read_text(encoding="utf-8").splitlines():
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn last line of an interrupted run
+                self.done[entry["url"]] = entry["object"]
+        self.manifest = open(self.manifest_path, "a", encoding="utf-8")
+
+    def put(self, url: str, body: bytes, content_type: str) -> bool:
+        """
+        Store `body` for `url`; returns False when identical content was already stored.
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        ext = mimetypes.guess_extension(content_type.split(";")[0].strip()) or ".img"
+        relative = f"objects/{digest[:2]}/{digest}{ext}"
+        target = self.directory / relative
+        new = not target.exists()
+        if new:
+            target.parent.mkdir(exist_ok=True)
+            partial = target.with_suffix(".part")
+            partial.write_bytes(body)
+            partial.replace(target)  # never leave a half-written object behind
+        self.done[url] = relative
+        self.manifest.write(json.dumps({"url": url, "object": relative}) + "\n")
+        self.manifest.flush()
+        return new
+
+    def close(self) -> None:
+        self.manifest.close()
+
+def asset_urls(meta_data: ChannelMetaData) -> List[str]:
+    """
+    Avatar, banner and every tab thumbnail, deduplicated in first-seen order.
+    """
+    urls = [meta_data.channel_image, meta_data.channel_banner]
+    for items in (meta_data.videos, meta_data.shorts, meta_data.live_streams, meta_data.playlists, meta_data.podcasts):
+        urls += [item.get("thumbnail") for item in items or []]
+    urls = ["https:" + u if u.startswith("//") else u for u in urls if u]
+    return list(dict.fromkeys(u for u in urls if u.startswith("http")))
+
+async def download_assets(meta_data: ChannelMetaData, directory: Path, connections: int = 16) -> None:
+    """
+    Fetch the channel images and thumbnails through one pooled keep-alive client, at most
+    `connections` at a time, into an AssetStore. Server errors and timeouts are retried.
+    """
+    if httpx is None:
+        print(f"{Colors.GRAY}  [httpx not installed, skipping asset downloads]{Colors.RESET}", flush=True)
+        return
+    store = AssetStore(directory)
+    urls = asset_urls(meta_data)
+    pending = [url for url in urls if url not in store.done]
+    semaphore = asyncio.Semaphore(connections)
+    counts = {"new": 0, "duplicate": 0, "failed": 0}
+    start = time.time()
+
+    async def fetch(client, url: str) -> None:
+        async with semaphore:
+            for attempt in range(3):
+                try:
+                    response = await client.get(url)
+                    response.raise_for_status()
+                    break
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code < 500 or attempt == 2:
+                        counts["failed"] += 1
+                        return
+                except httpx.HTTPError:
+                    if attempt == 2:
+                        counts["failed"] += 1
+                        return
+                await asyncio.sleep(2 ** attempt + random.random())
+        new = store.put(url, response.content, response.headers.get("content-type", ""))
+        counts["new" if new else "duplicate"] += 1
+        finished = counts["new"] + counts["duplicate"] + counts["failed"]
+        if finished % 100 == 0:
+            print(f"Assets: {finished:,} of {len(pending):,}", end='\r', flush=True)
+
+    async with httpx.AsyncClient(
+        http2=find_spec("h2") is not None,
+        headers=ASSET_HEADERS,
+        limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+        timeout=httpx.Timeout(15.0, pool=None),
+        follow_redirects=True,
+    ) as client:
+        try:
+            await asyncio.gather(*(fetch(client, url) for url in pending))
+        finally:
+            store.close()
+
+    print(f"{Colors.GRAY}  [Assets: {counts['new']:,} downloaded, {counts['duplicate']:,} duplicates, "
+          f"{len(urls) - len(pending):,} already present, {counts['failed']:,} failed "
+          f"in {time.time() - start:.1f}s -> {directory}]{Colors.RESET}", flush=True)
+
+async def warm_up_storage_state(paths: List[Path], profile: str = "default") -> None:
+    """
+    Visit the YouTube home page once per path, get past the consent interstitial and save the
+    resulting storage state so later contexts start already past it.
+    """
+    async with async_playwright() as p:
+        browser = await launch_browser(p, profile)
+        for path in paths:
+            context = await browser.new_context()
+            page = await context.new_page()
+            await page.goto("https://www.youtube.com/", timeout=LatencyBudget().start().remaining_ms())
+            consent = page.get_by_role("button", name=re.compile("Accept all|Reject all", re.I))
+            try:
+                await consent.first.click(timeout=5000)
+                await page.wait_for_load_state("networkidle", timeout=10000)
+            except Exception:
+                pass  # no interstitial served in this region
+            await context.storage_state(path=str(path))
+            await context.close()
+            print(f"{Colors.GRAY}  [Saved storage state to: {path}]{Colors.RESET}", flush=True)
+        await browser.close()
+
+async def expand_playlist(page, playlist: Dict[str, str], deadline: Deadline | None = None) -> List[Dict[str, str]]:
+    """
+    Every video of one playlist: the first page comes from the embedded ytInitialData,
+    the rest from the continuation responses captured while scrolling. `deadline` bounds
+    navigation and the selector waits.
+    """
+    deadline = deadline or LatencyBudget().start()
+    capture = BrowseCapture(page, parse_api_playlist_videos)
+    try:
+        await page.goto(playlist["link"], timeout=deadline.remaining_ms(0.6))
+        page.set_default_timeout(deadline.remaining_ms())
+        initial = await page.evaluate("() => window.ytInitialData || null")
+        containers = page.locator("ytd-playlist-video-renderer")
+        await scroll_tab(page, containers, capture)
+        items = parse_api_playlist_videos(initial) if initial else []
+        items += await capture.collect()
+        if not items:
+            items = await containers.evaluate_all("""els => els.map(el => {
+                const a = el.querySelector("a#video-title");
+                return {title: a ? a.innerText : null,
+                        link: a ? "https://www.youtube.com" + a.getAttribute("href").split("&")[0] : null};
+            })""")
+    finally:
+        page.remove_listener("response", capture.on_response)
+    deadline.finish()
+    unique: Dict[str, Dict[str, str]] = {}
+    for item in items:
+        if item.get("link"):
+            unique.setdefault(item["link"], item)
+    return list(unique.values())
+
+async def expand_playlists(browser, playlists: List[Dict[str, str]], known_videos: List[Dict[str, str]] | None,
+                           output: Path, pages: int = 4, storage_state: str | None = None,
+                           static_cache: StaticCache | None = None, budget: LatencyBudget | None = None) -> None:
+    """
+    Open every playlist on a pool of `pages` pages and stream one JSON line per playlist to
+    `output` as soon as it is done. A video is written out in full the first time it is met;
+    videos already in the videos tab or an earlier playlist are listed by link under "seen".
+    Each playlist gets a deadline from `budget`.
+    """
+    budget = budget or LatencyBudget()
+    seen = {video["link"] for video in known_videos or [] if video.get("link")}
+    queue: asyncio.Queue = asyncio.Queue()
+    for playlist in playlists:
+        if playlist.get("link"):
+            queue.put_nowait(playlist)
+    total, done, start = queue.qsize(), 0, time.time()
+    print(f"{Colors.CYAN}Expanding {total:,} playlists on {min(pages, total)} pages...{Colors.RESET}", flush=True)
+    context = await new_context(browser, storage_state, static_cache)
+
+    with open_output(output) as f:
+        async def worker() -> None:
+            nonlocal done
+            page = await context.new_page()
+            while not queue.empty():
+                playlist = queue.get_nowait()
+                line = {"link": playlist["link"], "title": playlist.get("title"), "status": "ok"}
+                try:
+                    items = await expand_playlist(page, playlist, budget.start())
+                except Exception:
+                    line["status"] = "failed"
+                    items = []
+                line["count"] = len(items)
+                line["videos"] = [item for item in items if item["link"] not in seen]
+                line["seen"] = [item["link"] for item in items if item["link"] in seen]
+                seen.update(item["link"] for item in items)
+                f.write(encode_json(line) + b"\n")
+                done += 1
+                print(f"Playlists: {done:,} of {total:,}", end='\r', flush=True)
+            await page.close()
+
+        await asyncio.gather(*(worker() for _ in range(min(pages, total))))
+    await context.close()
+    print(f"\n{Colors.GREEN}Expanded {total:,} playlists in {time.time() - start:.2f}s -> {output}{Colors.RESET}", flush=True)
+
+async def grab_channel_info(url: str, api_capture: bool = True, storage_states: List[Path] | None = None,
+                            output: Path = Path("channel.json"), limits: Dict[str, int] | None = None,
+                            since: Dict[str, datetime] | None = None,
+                            profiler: RunProfiler | None = None, pretty: bool = False,
+                            assets: Path | None = None, asset_connections: int = 16,
+                            static_cache: StaticCache | None = None, expand: Path | None = None,
+                            playlist_pages: int = 4, launch_profile: str = "default",
+                            deadline: float = 60.0) -> ChannelMetaData:
+    """
+    Scrape channel metadata and every available tab. With `api_capture`, tab items are built
+    from the browse API responses seen while scrolling, falling back to the DOM when none arrive.
+    Contexts rotate across `storage_states` when given. `limits` / `since` map a tab name (or
+    "*" for every tab) to an item count / publish cutoff that stops that tab's crawl early.
+    With `assets`, the avatar, banner and thumbnails are then downloaded into that directory.
+    `static_cache` serves JS/CSS/fonts from disk across every tab context. With `expand`, the
+    videos of every playlist are streamed to that JSONL file, `playlist_pages` at a time.
+    `launch_profile` picks the Chromium flags from LAUNCH_PROFILES. `deadline` caps the
+    seconds spent loading the channel page and each playlist.
+    """
+    limits, since = limits or {}, since or {}
+
+    def stop_at(tab: str) -> Tuple[int | None, datetime | None]:
+        return limits.get(tab, limits.get("*")), since.get(tab, since.get("*"))
     start = time.time()
+    states = cycle([str(state) for state in storage_states or []] or [None])
+    budget = LatencyBudget(ceiling=deadline)
 
     async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
+        browser = await launch_browser(p, launch_profile)
 
         # --- Initial context to discover tabs & metadata ---
-        base_context = await browser.new_context()
+        base_context = await new_context(browser, next(states), static_cache)
         base_page = await base_context.new_page()
 
-        meta_data, tabs = await channel_data(url, base_page)
+        meta_data, tabs = await channel_data(url, base_page, budget.start())
         await base_context.close()
 
         tasks = {}
@@ -433,31 +940,51 @@ async def grab_channel_info(url: str) -> ChannelMetaData:
         if tabs.videos:
             tasks["videos"] = scrape_with_context(
                 browser,
-                lambda page: pull_videos(url, page, tabs.videos)
+                lambda page: pull_videos(url, page, tabs.videos, api_capture, *stop_at("videos")),
+                next(states),
+                profiler,
+                "videos",
+                static_cache
             )
 
         if tabs.shorts:
             tasks["shorts"] = scrape_with_context(
                 browser,
-                lambda page: pull_shorts(url, page, tabs.shorts)
+                lambda page: pull_shorts(url, page, tabs.shorts, api_capture, *stop_at("shorts")),
+                next(states),
+                profiler,
+                "shorts",
+                static_cache
             )
 
         if tabs.live:
             tasks["live_streams"] = scrape_with_context(
                 browser,
-                lambda page: pull_live_streams(url, page, tabs.live)
+                lambda page: pull_live_streams(url, page, tabs.live, api_capture, *stop_at("live")),
+                next(states),
+                profiler,
+                "live_streams",
+                static_cache
             )
 
         if tabs.playlists:
             tasks["playlists"] = scrape_with_context(
                 browser,
-                lambda page: pull_playlists(url, page, tabs.playlists)
+                lambda page: pull_playlists(url, page, tabs.playlists, api_capture, *stop_at("playlists")),
+                next(states),
+                profiler,
+                "playlists",
+                static_cache
             )
 
         if tabs.podcasts:
             tasks["podcasts"] = scrape_with_context(
                 browser,
-                lambda page: pull_podcasts(url, page, tabs.podcasts)
+                lambda page: pull_podcasts(url, page, tabs.podcasts, api_capture, *stop_at("podcasts")),
+                next(states),
+                profiler,
+                "podcasts",
+                static_cache
             )
 
         # --- Run all scrapers concurrently ---
@@ -467,18 +994,226 @@ async def grab_channel_info(url: str) -> ChannelMetaData:
         for key, value in zip(tasks.keys(), results):
             setattr(meta_data, key, value)
 
+        if expand and meta_data.playlists:
+            await expand_playlists(browser, meta_data.playlists, meta_data.videos, expand,
+                                   playlist_pages, next(states), static_cache, budget)
+
         await browser.close()
 
-    save_meta_data_json(meta_data, Path("channel.json"))
+    if static_cache:
+        print(f"{Colors.GRAY}  [{static_cache.report()}]{Colors.RESET}", flush=True)
+    save_meta_data_json(meta_data, output, pretty)
+    if assets:
+        await download_assets(meta_data, assets, asset_connections)
 
     end = time.time()
     print(f"Time taken: {end - start:.2f} seconds")
 
     return meta_data
 
+def parse_per_tab(parser, option: str, values: List[str] | None, convert) -> Dict:
+    """
+    Parse repeated "[TAB=]VALUE" options into {tab: value}; "*" holds the all-tabs value.
+    """
+    parsed = {}
+    for value in values or []:
+        tab, _, raw = value.rpartition("=")
+        if tab and tab not in TAB_NAMES:
+            parser.error(f"{option}: unknown tab '{tab}' (choose from {', '.join(TAB_NAMES)}).")
+        try:
+            parsed[tab or "*"] = convert(raw)
+        except ValueError:
+            parser.error(f"{option}: invalid value '{raw}'.")
+    return parsed
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Fetch channel metadata and tab listings from a YouTube channel and export to JSON."
+    )
+
+    # single channel
+    parser.add_argument(
+        "link",
+        nargs="?",
+        help="YouTube channel URL (e.g. https://www.youtube.com/@mkbhd)"
+    )
+
+    # Output file
+    parser.add_argument(
+        "-o", "--output",
+        type=Path,
+        default=Path("channel.json"),
+        metavar="FILE",
+        help="JSON output file (default: channel.json)"
+    )
+
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        type=int,
+        const=10,
+        metavar="N",
+        help="Profile the run and keep Playwright traces for the slowest N tabs (default 10) and any "
+             "failures. The report is written to '<output>.profile/'."
+    )
+
+    parser.add_argument(
+        "--pretty",
+        action="store_true",
+        help="Indent JSON output. By default it is written compact; .gz/.zst filenames are compressed."
+    )
+
+    parser.add_argument(
+        "--dom",
+        action="store_true",
+        help="Scrape tab items from the rendered page instead of captured API responses."
+    )
+
+    # Early stop
+    parser.add_argument(
+        "--limit",
+        action="append",
+        metavar="[TAB=]N",
+        help="Stop a tab once N items are loaded. Without TAB it applies to every tab; "
+             "repeat for per-tab limits (e.g. --limit 200 --limit shorts=50)."
+    )
+    parser.add_argument(
+        "--since",
+        action="append",
+        metavar="[TAB=]DATE",
+        help="Stop a tab once items older than DATE appear (YYYY-MM-DD or e.g. '30 days'). "
+             "Only videos and live have publish dates."
+    )
+
+    # Optional playlist expansion stage
+    parser.add_argument(
+        "--expand-playlists",
+        nargs="?",
+        const=True,
+        metavar="FILE",
+        help="Also collect the videos of every playlist into a JSONL file (default: '<output>.playlists.jsonl')."
+    )
+    parser.add_argument(
+        "--playlist-pages",
+        type=int,
+        default=4,
+        metavar="N",
+        help="Playlists expanded concurrently with --expand-playlists (default: 4)."
+    )
+
+    # Optional asset download stage
+    parser.add_argument(
+        "--assets",
+        type=Path,
+        metavar="DIR",
+        help="Download the avatar, banner and all thumbnails into DIR (deduplicated, resumable; needs httpx)."
+    )
+    parser.add_argument(
+        "--asset-connections",
+        type=int,
+        default=16,
+        metavar="N",
+        help="Maximum concurrent pooled connections for --assets (default: 16)."
+    )
+
+    # Shared static asset cache
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        metavar="DIR",
+        help="Serve JS/CSS/font responses from an on-disk cache in DIR, shared by all contexts and later runs."
+    )
+    parser.add_argument(
+        "--cache-mb",
+        type=int,
+        default=512,
+        metavar="MB",
+        help="Size cap for --cache-dir; least recently used entries are evicted past it (default: 512)."
+    )
+
+    # Storage state (consent/cookies) handling
+    parser.add_argument(
+        "--state",
+        type=Path,
+        nargs="+",
+        metavar="FILE",
+        help="Saved Playwright storage state(s) to start contexts from; several are rotated."
+    )
+    parser.add_argument(
+        "--warm-up",
+        type=Path,
+        nargs="+",
+        metavar="FILE",
+        help="Create storage state file(s) past the consent interstitial, then exit."
+    )
+    parser.add_argument(
+        "--launch-profile",
+        choices=list(LAUNCH_PROFILES),
+        default="default",
+        help="Chromium launch flags: 'default' (Playwright's), 'lean' (no GPU/compositing, no autoplay), "
+             "'minimal' (lean without images) or 'new-headless' (lean on the full Chromium build)."
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=60.0,
+        metavar="SECONDS",
+        help="Upper bound on the time spent loading the channel page and each expanded playlist (default: 60)."
+    )
+
+    args = parser.parse_args()
+
+    if args.warm_up:
+        return args
+
+    if args.cache_mb <= 0:
+        parser.error("--cache-mb must be a positive number.")
+
+    for state in args.state or []:
+        if not state.is_file():
+            parser.error(f"Storage state '{state}' not found. Create it with --warm-up.")
+
+    if not args.link:
+        parser.error("A channel LINK must be provided.")
+
+    args.limit = parse_per_tab(parser, "--limit", args.limit, int)
+    args.since = parse_per_tab(parser, "--since", args.since, parse_since)
+    if any(limit <= 0 for limit in args.limit.values()):
+        parser.error("--limit must be a positive number.")
+    if args.asset_connections <= 0:
+        parser.error("--asset-connections must be a positive number.")
+    if args.playlist_pages <= 0:
+        parser.error("--playlist-pages must be a positive number.")
+    if args.deadline <= 0:
+        parser.error("--deadline must be a positive number.")
+    if args.expand_playlists is True:
+        args.expand_playlists = args.output.with_suffix(".playlists.jsonl")
+    elif args.expand_playlists:
+        args.expand_playlists = Path(args.expand_playlists)
+
+    return args
+
+
 async def main():
-    await grab_channel_info("https://www.youtube.com/@mkbhd")
-    # await grab_channel_info("https://www.youtube.com/@tseries")
+    args = parse_args()
+    profiler = RunProfiler(args.output.with_suffix(".profile"), args.profile) if args.profile else None
+    if profiler:
+        profiler.profile.enable()
+    try:
+        if args.warm_up:
+            await warm_up_storage_state(args.warm_up, args.launch_profile)
+        else:
+            await grab_channel_info(args.link, api_capture=not args.dom, storage_states=args.state, output=args.output,
+                                    limits=args.limit, since=args.since, profiler=profiler, pretty=args.pretty,
+                                    assets=args.assets, asset_connections=args.asset_connections,
+                                    static_cache=StaticCache(args.cache_dir, args.cache_mb) if args.cache_dir else None,
+                                    expand=args.expand_playlists, playlist_pages=args.playlist_pages,
+                                    launch_profile=args.launch_profile, deadline=args.deadline)
+    finally:
+        if profiler:
+            profiler.profile.disable()
+            report = profiler.write_report()
+            print(f"{Colors.GRAY}  [Saved profile report to: {report}]{Colors.RESET}", flush=True)
 
 
 if __name__ == "__main__":
@@ -1,8 +1,32 @@
-import asyncio, argparse, sys, math, random, time, re, psutil
+import asyncio, argparse, sys, sqlite3, math, time, re, psutil, json
 from pathlib import Path
 from playwright.async_api import async_playwright
 from dataclasses import dataclass
-from typing import List, Set, Tuple
+from typing import Dict, List, Set, Tuple
+from collections import deque
+
+try:
+    import orjson  # optional: faster JSON encoding
+except ImportError:
+    orjson = None
+
+try:
+    import httpx  # optional: browserless fast path (--http)
+except ImportError:
+    httpx = None
+
+# browser, queue, cache and output helpers shared with the other tools
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "common"))
+import scrape_common
+from scrape_common import (
+    BROWSE_API, LAUNCH_PROFILES, REFRESH_CYCLE, SQLITE_BATCH, api_text, benchmark_profiles,
+    CircuitBreaker, Colors, ContextPool, count_to_int, Deadline, dig, FastPathStats, find_renderers,
+    LatencyBudget, launch_browser, log, MemoryWatchdog, new_context, new_http_client, open_contexts,
+    open_output, profile_dir, recycle_browser, RefreshScheduler, run_worker, RunProfiler,
+    serve_queue, StaticCache, storage_state_for, time_taken, wait_for_growth, write_json_array,
+)
+
+SITE = "YouTube"  # names this tool in breaker messages
 
 
 @dataclass
@@ -15,14 +39,24 @@ class ShortMetaData:
     comment_count: str
     views: str
     upload_date: str
-    comments: List[str]
+    status: str = "ok"  # ok, listed, deleted, private, age_gated, region_blocked, challenged, failed
 
-class Colors:
-    RESET = "\033[0m"
-    GREEN = "\033[32m"
-    CYAN = "\033[36m"
-    BLUE = "\033[34m"
-    GRAY = "\033[90m"
+# checked in order, so the generic "unavailable" wording goes last
+UNAVAILABLE_PATTERNS = {
+    "private": r"this video is private",
+    "region_blocked": r"not made this video available in your country|not available in your country",
+    "age_gated": r"confirm your age|age-restricted",
+    "deleted": r"video (?:is )?unavailable|isn.t available anymore|has been removed|no longer available",
+}
+UNAVAILABLE_TEXT = re.compile("|".join(UNAVAILABLE_PATTERNS.values()), re.I)
+# the player's error screen in the active reel only: titles, descriptions, comments and the
+# preloaded neighbouring reels can quote the same phrases
+PLAYABILITY_ERROR = ("ytd-reel-video-renderer[is-active] yt-playability-error-supported-renderers, "
+                     "ytd-reel-video-renderer[is-active] #error-screen")
+
+STATS_SELECTOR = 'span[class*="yt-core-attributed-string yt-core-attributed-string--white-space-pre-wrap yt-core-attributed-string--text-alignment-center yt-core-attributed-string--word-wrapping"]'
+REEL_SEQUENCE_API = "/youtubei/v1/reel/reel_watch_sequence"
+CONSENT_BUTTON = re.compile("Accept all|Reject all", re.I)
 
 
 def optimal_chunk_size(n: int) -> int:
@@ -80,27 +114,6 @@ def optimal_chunk_size(n: int) -> int:
         return min(5, n)
 
 
-def log(message: str) -> None:
-    with open("yt_shorts.log", "a", encoding="utf-8") as log_file:
-        log_file.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} - {message}\n")
-
-
-def time_taken(start: float, stop: float) -> str:
-    elapsed = stop - start
-    hours = int(elapsed // 3600)
-    minutes = int((elapsed % 3600) // 60)
-    seconds = int(elapsed % 60)
-
-    parts = []
-    if hours:
-        parts.append(f"{hours}h")
-    if minutes:
-        parts.append(f"{minutes}m")
-    if seconds or not parts:
-        parts.append(f"{seconds}s")
-
-    return " ".join(parts)
-
 def description_sanitize(description: str) -> Tuple[str, str]:
     tags = re.findall(r'#\w+', description)
     clean_description = re.sub(r'#\w+', '', description).strip()
@@ -119,6 +132,16 @@ def is_comment(text: str) -> bool:
     text_lower = text.strip().lower()
     return len(text) > 2 and not any(phrase in text_lower for phrase in ui_phrases)
 
+def classify_unavailable(text: str) -> str | None:
+    for status, pattern in UNAVAILABLE_PATTERNS.items():
+        if re.search(pattern, text, re.I):
+            return status
+    return None
+
+def placeholder_short(url: str, status: str) -> ShortMetaData:
+    return ShortMetaData(link=url, title="N/A", tags="N/A", channel_link="N/A", likes="N/A", comment_count="N/A",
+                         views="N/A", upload_date="N/A", status=status)
+
 def is_short_url(url: str) -> bool:
     return "youtube.com/shorts/" in url
 
@@ -134,31 +157,402 @@ def load_links(file_path: Path = None) -> Set[str]:
 
 def save_shorts_csv(shorts: List[ShortMetaData], filepath: Path) -> None:
     import csv
-    fieldnames = [f for f in ShortMetaData.__dataclass_fields__.keys() if f != "comments"]
+    fieldnames = list(ShortMetaData.__dataclass_fields__.keys())
 
-    with open(filepath, 'w', newline='', encoding='utf-8') as output_file:
+    with open_output(filepath, text=True) as output_file:
         dict_writer = csv.DictWriter(output_file, fieldnames=fieldnames)
         dict_writer.writeheader()
         for short in shorts:
-            row = {k: v for k, v in short.__dict__.items() if k != "comments"}
-            dict_writer.writerow(row)
+            dict_writer.writerow(short.__dict__)
+
+def save_shorts_json(shorts: List[ShortMetaData], filepath: Path, pretty: bool = False) -> None:
+    with open_output(filepath) as output_file:
+        write_json_array([s.__dict__ for s in shorts], output_file, pretty)
+
+def short_id_from_url(url: str) -> str:
+    match = re.search(r'/shorts/([\w-]+)', url)
+    return match.group(1) if match else url
+
+def open_snapshot_db(filepath: Path):
+    db = sqlite3.connect(filepath)
+    db.execute("PRAGMA journal_mode = WAL")
+    db.execute("PRAGMA synchronous = NORMAL")
+    db.executescript("""
+        CREATE TABLE IF NOT EXISTS items (
+            item_id TEXT PRIMARY KEY,
+            link TEXT NOT NULL,
+            channel_link TEXT,
+            title TEXT,
+            tags TEXT,
+            upload_date TEXT,
+            first_seen INTEGER NOT NULL,
+            last_seen INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS snapshots (
+            item_id TEXT NOT NULL,
+            taken_at INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            likes INTEGER,
+            comments INTEGER,
+            views INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS snapshots_item_time ON snapshots (item_id, taken_at);
+        CREATE INDEX IF NOT EXISTS snapshots_time ON snapshots (taken_at);
+    """)
+    return db
+
+def save_shorts_sqlite(shorts: List[ShortMetaData], filepath: Path) -> None:
+    """
+    Upsert the Shorts into `items` and append one typed row per Short to `snapshots`,
+    so engagement growth across runs is an indexed lookup on (item_id, taken_at). "listed"
+    rows (title and rounded views from a channel listing) are partial and are not stored.
+    """
+    shorts = [s for s in shorts if s.status != "listed"]
+    db = open_snapshot_db(filepath)
+    taken_at = int(time.time())
+    for start in range(0, len(shorts), SQLITE_BATCH):
+        batch = shorts[start:start + SQLITE_BATCH]
+        with db:
+            db.executemany("""
+                INSERT INTO items (item_id, link, channel_link, title, tags, upload_date, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (item_id) DO UPDATE SET
+                    channel_link = excluded.channel_link, title = excluded.title, tags = excluded.tags,
+                    upload_date = excluded.upload_date, last_seen = excluded.last_seen
+            """, [(short_id_from_url(s.link), s.link, s.channel_link, s.title, s.tags, s.upload_date, taken_at, taken_at)
+                  for s in batch if s.status == "ok"])
+            db.executemany("INSERT INTO snapshots VALUES (?, ?, ?, ?, ?, ?)", [
+                (short_id_from_url(s.link), taken_at, s.status, count_to_int(s.likes), count_to_int(s.comment_count),
+                 count_to_int(s.views))
+                if s.status == "ok" else (short_id_from_url(s.link), taken_at, s.status, None, None, None)
+                for s in batch
+            ])
+    db.close()
+
+def iso_date(text: str) -> str:
+    """
+    "May 1, 2024" / "1 May 2024" from the description panel -> "2024-05-01", the format the page
+    JSON uses, so both paths write one date format. Anything else is returned unchanged.
+    """
+    for fmt in ("%b %d, %Y", "%B %d, %Y", "%d %b %Y", "%d %B %Y"):
+        try:
+            return time.strftime("%Y-%m-%d", time.strptime(text.strip(), fmt))
+        except ValueError:
+            pass
+    return text
+
+def posted_at(upload_date: str | None, first_seen: int) -> float:
+    # older snapshots may still hold the description panel's "May 1, 2024"
+    for fmt in ("%Y-%m-%d", "%b %d, %Y"):
+        try:
+            return time.mktime(time.strptime(upload_date or "", fmt))
+        except ValueError:
+            pass
+    return first_seen
 
-def save_shorts_json(shorts: List[ShortMetaData], filepath: Path) -> None:
-    import json
-    with open(filepath, 'w', encoding='utf-8') as output_file:
-        json.dump([s.__dict__ for s in shorts], output_file, ensure_ascii=False, indent=4)
+def known_channels(path: Path, urls: List[str]) -> Dict[str, Dict[str, Tuple[str, str]]]:
+    """
+    Group the URLs whose channel a snapshot database already records by that channel:
+    channel link -> {video ID: (url, stored upload date)}. Unknown URLs are left out.
+    """
+    wanted = {short_id_from_url(url): url for url in urls}
+    db = open_snapshot_db(path)
+    rows = db.execute("SELECT item_id, channel_link, upload_date FROM items "
+                      "WHERE channel_link IS NOT NULL AND channel_link != 'N/A'").fetchall()
+    db.close()
+    channels: Dict[str, Dict[str, Tuple[str, str]]] = {}
+    for item_id, channel_link, upload_date in rows:
+        if item_id in wanted:
+            channels.setdefault(channel_link, {})[item_id] = (wanted[item_id], upload_date or "N/A")
+    return channels
+
+def save_outputs(shorts: List[ShortMetaData], args: argparse.Namespace) -> None:
+    if args.csv:
+        save_shorts_csv(shorts, args.csv)
+        print(f"{Colors.GRAY}  [Saved CSV to: {args.csv}]{Colors.RESET}", flush=True)
+    if args.json:
+        save_shorts_json(shorts, args.json, args.pretty)
+        print(f"{Colors.GRAY}  [Saved JSON to: {args.json}]{Colors.RESET}", flush=True)
+    if args.sqlite:
+        save_shorts_sqlite(shorts, args.sqlite)
+        print(f"{Colors.GRAY}  [Saved snapshots to: {args.sqlite}]{Colors.RESET}", flush=True)
 
-async def grab_short_info(page, url: str, retry: int = 0) -> ShortMetaData:
+def extract_json_var(html: str, name: str) -> dict | None:
+    match = re.search(rf'{name}\s*=\s*(?=\{{)', html)
+    if not match:
+        return None
     try:
-        await page.goto(url, timeout=60000)
-        
+        value, _ = json.JSONDecoder().raw_decode(html, match.end())
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
+
+def parse_short_state(url: str, html: str) -> ShortMetaData | None:
+    """
+    Build metadata from the player response and initial data embedded in the Shorts page,
+    or None if any listed field is missing.
+    """
+    player = extract_json_var(html, "ytInitialPlayerResponse")
+    data = extract_json_var(html, "ytInitialData")
+    if not player or not data:
+        return None
+    playability = player.get("playabilityStatus") or {}
+    if playability.get("status") != "OK":
+        status = classify_unavailable(f"{playability.get('reason', '')} {api_text(playability.get('subreason')) or ''}")
+        return placeholder_short(url, status) if status else None
+
+    details = player.get("videoDetails") or {}
+    micro = dig(player, "microformat", "playerMicroformatRenderer") or {}
+
+    likes = None
+    for r in find_renderers(data, "likeButtonRenderer"):
+        likes = api_text(r.get("likeCountWithoutLikeText")) or r.get("likeCount")
+        break
+    if likes is None:
+        for r in find_renderers(data, "likeButtonViewModel"):
+            likes = dig(r, "likeButtonViewModel", "toggleButtonViewModel", "toggleButtonViewModel",
+                        "defaultButtonViewModel", "buttonViewModel", "title")
+            break
+
+    comment_count = None
+    for r in find_renderers(data, "engagementPanelSectionListRenderer"):
+        if r.get("panelIdentifier") == "engagement-panel-comments-section":
+            comment_count = api_text(dig(r, "header", "engagementPanelTitleHeaderRenderer", "contextualInfo"))
+            break
+
+    if not details.get("title") or likes is None or comment_count is None:
+        return None
+
+    title, tags = description_sanitize(details["title"])
+    views = details.get("viewCount")
+    return ShortMetaData(
+        link=url,
+        title=title,
+        channel_link=re.sub(r"^http://", "https://", micro.get("ownerProfileUrl", "N/A")),
+        tags=tags,
+        likes=str(likes),
+        comment_count=str(comment_count),
+        views=f"{int(views):,}" if views and views.isdigit() else "N/A",
+        upload_date=(micro.get("publishDate") or "N/A")[:10],
+    )
+
+def parse_related_shorts(payload: dict) -> List[str]:
+    """
+    Video IDs of the Shorts the player queues up next, in feed order.
+    """
+    return [endpoint["videoId"] for endpoint in find_renderers(payload, "reelWatchEndpoint") if endpoint.get("videoId")]
+
+class RelatedCapture:
+    """
+    Collects the next/related Shorts from the reel_watch_sequence responses the player fires
+    when a Short is opened.
+    """
+    def __init__(self, page):
+        self.ids: Dict[str, None] = {}  # insertion-ordered set
+        self.pending: Set[asyncio.Task] = set()
+        page.on("response", self.on_response)
+
+    def on_response(self, response) -> None:
+        if REEL_SEQUENCE_API in response.url and response.ok:
+            task = asyncio.ensure_future(self.consume(response))
+            self.pending.add(task)
+            task.add_done_callback(self.pending.discard)
+
+    async def consume(self, response) -> None:
+        try:
+            payload = await response.json()
+        except Exception:
+            return
+        for video_id in parse_related_shorts(payload):
+            self.ids.setdefault(video_id)
+
+    async def collect(self, timeout: float = 3.0) -> List[str]:
+        # the sequence request can still be in flight when the stats are already on screen
+        waited = 0.0
+        while not self.ids and not self.pending and waited < timeout:
+            await asyncio.sleep(0.25)
+            waited += 0.25
+        if self.pending:
+            await asyncio.gather(*self.pending, return_exceptions=True)
+        return list(self.ids)
+
+class Frontier:
+    """
+    Breadth-first crawl frontier of (url, depth), deduplicated by video ID. Memory stays
+    bounded: at most `capacity` URLs wait in the queue (later discoveries are dropped), and
+    the seen set only holds queued and dispatched IDs, never more than capacity + limit.
+    """
+    def __init__(self, max_depth: int, limit: int, capacity: int = 10_000):
+        self.max_depth = max_depth
+        self.limit = limit
+        self.capacity = capacity
+        self.queue: deque = deque()
+        self.seen: Set[str] = set()
+        self.dispatched = 0
+        self.dropped = 0
+
+    def add(self, url: str, depth: int) -> bool:
+        video_id = short_id_from_url(url)
+        if depth > self.max_depth or video_id in self.seen:
+            return False
+        if len(self.queue) >= self.capacity:
+            self.dropped += 1
+            return False
+        self.seen.add(video_id)
+        self.queue.append((url, depth))
+        return True
+
+    def take(self, n: int) -> List[Tuple[str, int]]:
+        n = min(n, self.limit - self.dispatched, len(self.queue))
+        self.dispatched += n
+        return [self.queue.popleft() for _ in range(n)]
+
+    def done(self) -> bool:
+        return not self.queue or self.dispatched >= self.limit
+
+def parse_api_shorts(payload: dict) -> List[Dict[str, str]]:
+    shorts = []
+    for r in find_renderers(payload, "shortsLockupViewModel"):
+        video_id = dig(r, "onTap", "innertubeCommand", "reelWatchEndpoint", "videoId")
+        if not video_id:
+            continue
+        views = dig(r, "overlayMetadata", "secondaryText", "content") or ""
+        shorts.append({
+            "title": dig(r, "overlayMetadata", "primaryText", "content"),
+            "link": f"https://www.youtube.com/shorts/{video_id}",
+            "views": views.replace(" views", "") or None,
+        })
+    # older layout still served to some clients
+    for r in find_renderers(payload, "reelItemRenderer"):
+        if not r.get("videoId"):
+            continue
+        views = api_text(r.get("viewCountText")) or ""
+        shorts.append({
+            "title": api_text(r.get("headline")),
+            "link": f"https://www.youtube.com/shorts/{r['videoId']}",
+            "views": views.replace(" views", "") or None,
+        })
+    return shorts
+
+class ListingCapture:
+    """
+    Collects the Shorts of a channel's Shorts tab from its initial data and from the browse
+    continuation responses fired while the grid is scrolled.
+    """
+    def __init__(self, page):
+        self.items: Dict[str, Dict[str, str]] = {}  # video ID -> listing item
+        self.pending: Set[asyncio.Task] = set()
+        page.on("response", self.on_response)
+
+    def on_response(self, response) -> None:
+        if BROWSE_API in response.url and response.ok:
+            task = asyncio.ensure_future(self.consume(response))
+            self.pending.add(task)
+            task.add_done_callback(self.pending.discard)
+
+    async def consume(self, response) -> None:
+        try:
+            payload = await response.json()
+        except Exception:
+            return
+        self.add(payload)
+
+    def add(self, payload: dict | None) -> None:
+        for item in parse_api_shorts(payload or {}):
+            self.items.setdefault(short_id_from_url(item["link"]), item)
+
+    async def settle(self, seen: int, timeout: float = 2.0) -> bool:
+        """
+        Wait until more than `seen` Shorts are listed or the timeout expires.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.pending:
+                await asyncio.gather(*self.pending, return_exceptions=True)
+            if len(self.items) > seen:
+                return True
+            await asyncio.sleep(0.2)
+        return False
+
+async def page_challenged(page) -> bool:
+    # Google's "unusual traffic" interstitial; the consent wall is not a challenge, see pass_consent
+    return "/sorry/" in page.url
+
+async def pass_consent(page, deadline: Deadline) -> None:
+    """
+    Click through the consent.* interstitial served in some regions before any YouTube page.
+    The choice is stored in the context's cookies, so later pages on it go straight through.
+    """
+    if not re.match(r"https?://consent\.", page.url):
+        return
+    await page.get_by_role("button", name=CONSENT_BUTTON).first.click(timeout=deadline.remaining_ms())
+    await page.wait_for_url(re.compile(r"https?://(?:www|m)\.youtube\.com/"), timeout=deadline.remaining_ms())
+
+def is_challenge_response(response) -> bool:
+    # Google "unusual traffic" interstitial; a consent redirect only sends the URL to the browser
+    return response.status_code == 429 or "/sorry/" in response.url.path
+
+async def http_grab_short_info(urls: List[str], args: argparse.Namespace) -> Tuple[List[ShortMetaData], List[str], FastPathStats]:
+    """
+    Try every URL over plain HTTP. Returns (parsed results, URLs that need the browser, stats).
+    """
+    stats = FastPathStats()
+    if httpx is None:
+        print(f"{Colors.GRAY}  [httpx not installed, skipping HTTP fast path]{Colors.RESET}", flush=True)
+        return [], urls, stats
+
+    results: List[ShortMetaData] = []
+    misses: List[str] = []
+
+    async with new_http_client(args.http_connections) as client:
+        async def fetch(url: str) -> None:
+            try:
+                response = await client.get(url)
+            except httpx.HTTPError as e:
+                log(f"HTTP fast path failed for {url}: {e!r}")
+                response = None
+            if response is not None and is_challenge_response(response):
+                stats.challenges += 1
+                response = None
+            short_info = parse_short_state(url, response.text) if response is not None else None
+            if short_info:
+                stats.hits += 1
+                results.append(short_info)
+            else:
+                stats.fallbacks += 1
+                misses.append(url)
+
+        await asyncio.gather(*(fetch(url) for url in urls))
+
+    return results, misses, stats
+
+async def grab_short_info(page, url: str, retry: int = 0, deadline: Deadline | None = None) -> ShortMetaData:
+    deadline = deadline or LatencyBudget().start()
+    try:
+        # navigation gets most of what is left; selector waits share the rest
+        await page.goto(url, timeout=deadline.remaining_ms(0.6))
+        await pass_consent(page, deadline)
+        page.set_default_timeout(deadline.remaining_ms())
+        if await page_challenged(page):
+            log(f"Challenged on {url}")
+            return placeholder_short(url, "challenged")
+
+        # fail fast on deleted/private/blocked pages instead of waiting out the selectors
+        stats_elem = page.locator(STATS_SELECTOR)
+        error = page.locator(PLAYABILITY_ERROR).filter(has_text=UNAVAILABLE_TEXT)
+        await stats_elem.or_(error).filter(visible=True).first.wait_for()
+        page.set_default_timeout(deadline.remaining_ms())
+        if not await stats_elem.first.is_visible():
+            status = classify_unavailable(await error.first.inner_text()) if await error.count() else None
+            if status:
+                log(f"Skipping {url}: {status}")
+                return placeholder_short(url, status)
+
         short_title = page.locator('span[class*="yt-core-attributed-string yt-core-attributed-string--white-space-pre-wrap yt-core-attributed-string--link-inherit-color"]')
         title, tags = description_sanitize(await short_title.inner_text())
         channel_name = await page.locator('span.ytReelChannelBarViewModelChannelName.yt-core-attributed-string').inner_text()
         channel_link = f"https://www.youtube.com/{channel_name}"
-        stats_elem = 'span[class*="yt-core-attributed-string yt-core-attributed-string--white-space-pre-wrap yt-core-attributed-string--text-alignment-center yt-core-attributed-string--word-wrapping"]'
-        stats_elem = page.locator(stats_elem)
-        await stats_elem.first.wait_for(state="visible", timeout=3000)
+        await stats_elem.first.wait_for(state="visible", timeout=min(3000, deadline.remaining_ms()))
         stats_texts = await stats_elem.all_inner_texts()
         likes, comment_count = stats_texts[0], stats_texts[2]
 
@@ -175,22 +569,9 @@ async def grab_short_info(page, url: str, retry: int = 0) -> ShortMetaData:
         views, date = "N/A", "N/A"
         if aria_labels:
             views = aria_labels[1].replace(" views", "")
-            date = aria_labels[2]
-        
-        try:
-            # comments
-            await stats_elem.nth(2).click() # Click on comments count to load comments
-            await asyncio.sleep(1.5)  # Wait for comments to load
-            comments_section = page.locator('div[class*=" style-scope ytd-item-section-renderer style-scope ytd-item-section-renderer"]')
-            comments_section = await comments_section.locator('span[class*="yt-core-attributed-string yt-core-attributed-string--white-space-pre-wrap"]').all_inner_texts()
-            comments = []
-            for comment in comments_section:
-                if is_comment(comment):
-                    comments.append(comment)
-        except:
-            comments = []
-
-        return ShortMetaData(
+            date = iso_date(aria_labels[2])
+
+        short_info = ShortMetaData(
             link=url,
             title=title,
             channel_link=channel_link,
@@ -199,90 +580,404 @@ async def grab_short_info(page, url: str, retry: int = 0) -> ShortMetaData:
             comment_count=comment_count,
             views=views,
             upload_date=date,
-            comments=comments
         )
+        deadline.finish()
+        return short_info
 
     except Exception as e:
-        if retry >= 2:
-            return ShortMetaData( link=url,  title="N/A", tags="N/A", channel_link="N/A",likes="N/A", comment_count="N/A", views="N/A", upload_date="N/A", comments=[])
+        if await page_challenged(page):
+            log(f"Challenged on {url}")
+            return placeholder_short(url, "challenged")
+        if retry >= 2 or deadline.expired:
+            log(f"Failed to fetch metadata for {url} after {retry + 1} attempt(s): {e}")
+            return placeholder_short(url, "failed")
         else:
-            await page.close()
-            return await grab_short_info(page, url, retry + 1)
+            return await grab_short_info(page, url, retry + 1, deadline)
     
+
+async def harvest_short_comments(page, url: str, max_comments: int, idle_rounds: int = 3,
+                                 deadline: Deadline | None = None) -> List[str]:
+    """
+    Open the comment panel and scroll it until `max_comments` are loaded or no new comments appear.
+    `deadline` bounds navigation and the waits for the panel; the scrolling is bounded by `idle_rounds`.
+    """
+    deadline = deadline or LatencyBudget().start()
+    await page.goto(url, timeout=deadline.remaining_ms(0.6))
+    await pass_consent(page, deadline)
+    page.set_default_timeout(deadline.remaining_ms())
+    stats_elem = page.locator(STATS_SELECTOR)
+    await stats_elem.first.wait_for(state="visible", timeout=min(10000, deadline.remaining_ms()))
+    await stats_elem.nth(2).click() # Click on comments count to open the panel
+    threads = page.locator('ytd-comment-thread-renderer')
+    try:
+        await threads.first.wait_for(state="visible", timeout=min(10000, deadline.remaining_ms()))
+    except Exception:
+        return []  # comments disabled or none posted
+
+    idle = 0
+    while idle < idle_rounds:
+        seen = await threads.count()
+        if seen >= max_comments:
+            break
+        await threads.last.scroll_into_view_if_needed()
+        idle = 0 if await wait_for_growth(threads, seen) else idle + 1
+
+    texts = await threads.locator('#content-text').all_inner_texts()
+    return [t.strip() for t in texts if is_comment(t)][:max_comments]
+
+async def bulk_short_comments(urls: List[str], contexts: "ContextPool", args: argparse.Namespace,
+                              breaker: CircuitBreaker | None = None) -> None:
+    """
+    Low-priority comment stage: runs after metadata with half the page budget and streams
+    one JSON line per Short to `args.comments`. Pages are spread over the healthy contexts
+    of the pool and go through the same challenge breaker as the metadata stage; challenged
+    Shorts are logged and left out of the JSONL.
+    """
+    n = len(urls)
+    print(f"{Colors.CYAN}Harvesting up to {args.max_comments:,} comments for {n} Shorts...{Colors.RESET}", flush=True)
+    semaphore = asyncio.Semaphore(max(1, optimal_chunk_size(n) // 2))
+    budget = LatencyBudget(ceiling=args.deadline)
+    completed, challenged = 0, 0
+
+    with open_output(args.comments, text=True, append=True) as output_file:
+        async def worker(i: int, url: str) -> None:
+            nonlocal completed, challenged
+            async with semaphore:
+                probe = await breaker.admit() if breaker else False
+                healthy = contexts.healthy()
+                context = healthy[i % len(healthy)]
+                page = await context.new_page()
+                try:
+                    comments = await harvest_short_comments(page, url, args.max_comments, deadline=budget.start())
+                except Exception as e:
+                    log(f"Failed to harvest comments for {url}: {e}")
+                    comments = []
+                finally:
+                    hit = await page_challenged(page)
+                    await page.close()
+                if breaker:
+                    breaker.record(hit, probe)
+            if hit:
+                log(f"Challenged on {url} (comments)")
+                contexts.flag(context)
+                challenged += 1
+                return
+            output_file.write(json.dumps({"link": url, "count": len(comments), "comments": comments}, ensure_ascii=False) + "\n")
+            output_file.flush()
+            completed += 1
+            print(f"Comments: {completed:,} of {n:,}", end='\r', flush=True)
+
+        await asyncio.gather(*(worker(i, url) for i, url in enumerate(urls)))
+
+    if challenged:
+        print(f"{Colors.GRAY}  [Comments skipped for {challenged:,} challenged pages]{Colors.RESET}", flush=True)
+    print(f"{Colors.GRAY}  [Saved comments to: {args.comments}]{Colors.RESET}", flush=True)
+
+async def warm_up_storage_state(paths: List[Path], profile: str = "default") -> None:
+    """
+    Visit the YouTube home page once per path, get past the consent/cookie interstitial and
+    save the resulting storage state so later contexts start already past it.
+    """
+    async with async_playwright() as p:
+        browser = await launch_browser(p, profile)
+        for path in paths:
+            context = await browser.new_context()
+            page = await context.new_page()
+            await page.goto("https://www.youtube.com/", timeout=LatencyBudget().start().remaining_ms())
+            consent = page.get_by_role("button", name=CONSENT_BUTTON)
+            try:
+                await consent.first.click(timeout=5000)
+                await page.wait_for_load_state("networkidle", timeout=10000)
+            except Exception:
+                pass  # no interstitial served in this region
+            await context.storage_state(path=str(path))
+            await context.close()
+            print(f"{Colors.GRAY}  [Saved storage state to: {path}]{Colors.RESET}", flush=True)
+        await browser.close()
+
+async def scrape_short_chunk(chunk_urls: List[str], contexts: ContextPool, budget: LatencyBudget, offset: int = 0,
+                             profiler: RunProfiler | None = None,
+                             breaker: CircuitBreaker | None = None,
+                             related: Dict[str, List[str]] | None = None) -> List[ShortMetaData]:
+    """
+    Scrape one chunk concurrently, one page per URL spread across `contexts`. With `related`,
+    the Shorts the player queues after each URL are collected into it (url -> video IDs).
+    """
+    chunk = await profiler.start_chunk(contexts, offset) if profiler else None
+    # Launch one page per URL in this chunk
+    async def fetch(url: str, page) -> ShortMetaData:
+        probe = await breaker.admit() if breaker else False
+        capture = RelatedCapture(page) if related is not None else None
+        result = await grab_short_info(page, url, deadline=budget.start())
+        if capture and result.status == "ok":
+            related[url] = await capture.collect()
+        if result.status == "challenged":
+            contexts.flag(page.context)
+        if breaker:
+            breaker.record(result.status == "challenged", probe)
+        return result
+
+    tasks, pages = [], []
+    healthy = contexts.healthy()
+    for j, url in enumerate(chunk_urls):
+        page = await healthy[(offset + j) % len(healthy)].new_page()
+        pages.append(page)
+        task = fetch(url, page)
+        tasks.append(profiler.timed(url, chunk, task) if profiler else task)
+
+    # Process chunk with live progress
+    chunk_results: List[ShortMetaData] = []
+
+    for coro in asyncio.as_completed(tasks):
+        try:
+            result = await coro
+            chunk_results.append(result)
+        except Exception as e:
+            print(f"\nTask failed: {e}", flush=True)
+
+    await asyncio.gather(*[page.close() for page in pages], return_exceptions=True)
+    if profiler:
+        await profiler.stop_chunk(contexts, chunk)
+    return chunk_results
+
+async def list_channel_shorts(channel_link: str, wanted: Set[str], page, idle_rounds: int = 3,
+                              deadline: Deadline | None = None) -> Dict[str, Dict[str, str]]:
+    """
+    Scroll a channel's Shorts tab until every wanted video ID is listed or the grid stops
+    growing for `idle_rounds` scrolls. Returns video ID -> listing item. `deadline` bounds
+    the navigation; the scrolling is bounded by `idle_rounds`.
+    """
+    deadline = deadline or LatencyBudget().start()
+    capture = ListingCapture(page)
+    await page.goto(f"{channel_link.rstrip('/')}/shorts", timeout=deadline.remaining_ms(0.6))
+    await pass_consent(page, deadline)
+    page.set_default_timeout(deadline.remaining_ms())
+    if await page_challenged(page):
+        log(f"Challenged on the Shorts tab of {channel_link}")
+        return {}
+    capture.add(await page.evaluate("() => window.ytInitialData"))
+
+    idle = 0
+    while idle < idle_rounds and not wanted <= capture.items.keys():
+        seen = len(capture.items)
+        await page.mouse.wheel(0, 5000)
+        idle = 0 if await capture.settle(seen) else idle + 1
+    return capture.items
+
+async def listing_grab_short_info(urls: List[str], contexts: ContextPool, args: argparse.Namespace) -> Tuple[List[ShortMetaData], List[str]]:
+    """
+    Fill title and views for every URL whose channel --sqlite already knows from one crawl of
+    that channel's Shorts tab. Returns (listed results, URLs that still need their own page).
+    Listed Shorts get status "listed": they keep the stored upload date, their views are the
+    rounded grid figure and likes / comment count are "N/A", so they never become snapshots.
+    """
+    channels = known_channels(args.sqlite, urls)
+    budget = LatencyBudget(ceiling=args.deadline)
+    results: List[ShortMetaData] = []
+    listed: Set[str] = set()
+
+    async def list_channel(channel_link: str, shorts: Dict[str, Tuple[str, str]], context) -> None:
+        page = await context.new_page()
+        try:
+            items = await list_channel_shorts(channel_link, set(shorts), page, deadline=budget.start())
+        except Exception as e:
+            log(f"Shorts tab listing failed for {channel_link}: {e!r}")
+            items = {}
+        finally:
+            await page.close()
+        for video_id, (url, upload_date) in shorts.items():
+            item = items.get(video_id)
+            if not item or not item["title"] or not item["views"]:
+                continue  # not listed (or without views); the page fallback covers it
+            title, tags = description_sanitize(item["title"])
+            results.append(ShortMetaData(link=url, title=title, tags=tags, channel_link=channel_link,
+                                         likes="N/A", comment_count="N/A", views=item["views"],
+                                         upload_date=upload_date, status="listed"))
+            listed.add(url)
+
+    # only channels with several wanted Shorts are worth a tab crawl
+    crawl = [(link, shorts) for link, shorts in channels.items() if len(shorts) > 1]
+    chunk_size = optimal_chunk_size(len(crawl))
+    for i in range(0, len(crawl), chunk_size):
+        healthy = contexts.healthy()
+        await asyncio.gather(*(list_channel(link, shorts, healthy[(i + j) % len(healthy)])
+                               for j, (link, shorts) in enumerate(crawl[i:i + chunk_size])))
+
+    message = (f"Channel listings: {len(results):,} Shorts from {len(crawl):,} Shorts tabs, "
+               f"{len(urls) - len(results):,} left for individual pages")
+    print(f"{Colors.GRAY}  [{message}]{Colors.RESET}", flush=True)
+    log(message)
+    return results, [url for url in urls if url not in listed]
+
 async def bulk_grab_short_info(urls: Set[str], args: argparse.Namespace) -> List[ShortMetaData]:
     url_list = list(urls)
     n = len(url_list)
     print(f"{Colors.CYAN}Processing {n} YT short URLs...{Colors.RESET}", flush=True)
-    chunk_size = optimal_chunk_size(n)
     total_completed = 0
     all_results: List[ShortMetaData] = []
+    start = time.time()
+
+    # browserless pass first; only the misses go through Chromium
+    browser_urls = url_list
+    if args.http:
+        all_results, browser_urls, stats = await http_grab_short_info(url_list, args)
+        total_completed = len(all_results)
+        print(f"{Colors.GRAY}  [{stats.report()}]{Colors.RESET}", flush=True)
+        log(stats.report())
+    chunk_size = optimal_chunk_size(len(browser_urls))
 
     async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context()
+        browser = await launch_browser(p, args.launch_profile)
+        contexts = await open_contexts(browser, args)
+        watchdog = MemoryWatchdog(args.max_browser_mb)
+        budget = LatencyBudget(ceiling=args.deadline)
+        breaker = CircuitBreaker(SITE, args.challenge_threshold, args.cooldown)
+        if args.listing:
+            listed, browser_urls = await listing_grab_short_info(browser_urls, contexts, args)
+            all_results.extend(listed)
+            total_completed += len(listed)
+            chunk_size = optimal_chunk_size(len(browser_urls))
         # Process in chunks
-        start = time.time()
-        for i in range(0, n, chunk_size):
+        for i in range(0, len(browser_urls), chunk_size):
             print(f"Progress: {total_completed:,} of {n:,}", end='\r', flush=True)
-            chunk_urls = url_list[i:i + chunk_size]
-            # Launch one page per URL in this chunk
-            tasks, pages = [], []
-            for url in chunk_urls:
-                page = await context.new_page()
-                await page.set_viewport_size({"width": random.randint(800, 1120), "height": random.randint(600, 1080)}) # randomize viewport size
-                pages.append(page)
-                tasks.append(grab_short_info(page, url))
-
-            # Process chunk with live progress
-            chunk_results: List[ShortMetaData] = []
-            completed = 0
-
-            for coro in asyncio.as_completed(tasks):
-                try:
-                    result = await coro
-                    chunk_results.append(result)
-                except Exception as e:
-                    print(f"\nTask failed: {e}", flush=True)
-                completed += 1
-            
-            await asyncio.gather(*[page.close() for page in pages], return_exceptions=True)
+            chunk_urls = browser_urls[i:i + chunk_size]
+            chunk_results = await scrape_short_chunk(chunk_urls, contexts, budget, i, args.profiler, breaker)
             all_results.extend(chunk_results)
-            total_completed += completed
+            total_completed += len(chunk_results)
+
+            await contexts.retire_challenged()
+            if watchdog.over_limit():
+                browser, contexts = await recycle_browser(p, browser, contexts, watchdog, args)
         
         stop = time.time()
-        if args.csv:
-            save_shorts_csv(all_results, args.csv)
-            print(f"{Colors.GRAY}  [Saved CSV to: {args.csv}]{Colors.RESET}", flush=True)
-        if args.json:
-            save_shorts_json(all_results, args.json)
-            print(f"{Colors.GRAY}  [Saved JSON to: {args.json}]{Colors.RESET}", flush=True)
+        unavailable = sum(1 for r in all_results if r.status not in ("ok", "listed", "failed", "challenged"))
+        if unavailable:
+            print(f"{Colors.GRAY}  [Skipped {unavailable:,} unavailable (deleted/private/age-gated/region-blocked)]{Colors.RESET}", flush=True)
+        challenged = sum(1 for r in all_results if r.status == "challenged")
+        if challenged:
+            print(f"{Colors.GRAY}  [{challenged:,} challenged (status 'challenged'), breaker tripped {breaker.trips} time(s)]{Colors.RESET}", flush=True)
+        if budget.samples:
+            log(f"Per-URL latency p95 {budget.p95():.1f}s, deadline settled at {budget.seconds():.1f}s")
+        if watchdog.recycles:
+            log(watchdog.report())
+            print(f"{Colors.GRAY}  [{watchdog.report()}]{Colors.RESET}", flush=True)
+        if contexts.retired:
+            log(f"Retired {contexts.retired} challenged browser contexts")
+            print(f"{Colors.GRAY}  [Retired {contexts.retired} challenged browser contexts]{Colors.RESET}", flush=True)
+        if args.static_cache:
+            log(args.static_cache.report())
+            print(f"{Colors.GRAY}  [{args.static_cache.report()}]{Colors.RESET}", flush=True)
+        save_outputs(all_results, args)
 
         print(f"\n{Colors.GREEN} Completed  {n:,} Shorts in {time_taken(start, stop)}.{Colors.RESET}", flush=True)
 
+        # comments run last so they never hold up metadata
+        if args.max_comments:
+            await bulk_short_comments([r.link for r in all_results if r.status in ("ok", "listed")], contexts, args, breaker)
+
         await browser.close()
         return all_results
 
 
-async def single_grab_short_info(url: str, args: argparse.Namespace) -> List[ShortMetaData]:
+async def crawl_shorts(seeds: List[str], args: argparse.Namespace) -> List[ShortMetaData]:
+    """
+    Discovery mode: scrape the seed Shorts, queue the Shorts the player surfaces next for each
+    of them, and keep going breadth-first until --depth or --max-shorts is reached.
+    """
+    frontier = Frontier(args.depth, args.max_shorts)
+    for url in seeds:
+        frontier.add(url, 0)
+    print(f"{Colors.CYAN}Crawling from {len(frontier.queue):,} seed Shorts (depth {args.depth}, "
+          f"up to {args.max_shorts:,})...{Colors.RESET}", flush=True)
+    all_results: List[ShortMetaData] = []
+    chunk_size = optimal_chunk_size(args.max_shorts)
+    start = time.time()
+
     async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-        start = time.time()
-        short_info = await grab_short_info(page,url)
+        browser = await launch_browser(p, args.launch_profile)
+        contexts = await open_contexts(browser, args)
+        watchdog = MemoryWatchdog(args.max_browser_mb)
+        budget = LatencyBudget(ceiling=args.deadline)
+        breaker = CircuitBreaker(SITE, args.challenge_threshold, args.cooldown)
+        while not frontier.done():
+            offset = frontier.dispatched
+            batch = frontier.take(chunk_size)
+            depth = dict(batch)
+            related: Dict[str, List[str]] = {}
+            all_results += await scrape_short_chunk(list(depth), contexts, budget, offset, args.profiler,
+                                                    breaker, related)
+            for url, video_ids in related.items():
+                for video_id in video_ids:
+                    frontier.add(f"https://www.youtube.com/shorts/{video_id}", depth[url] + 1)
+            print(f"Crawled: {len(all_results):,}, queued: {len(frontier.queue):,}", end='\r', flush=True)
+
+            await contexts.retire_challenged()
+            if watchdog.over_limit():
+                browser, contexts = await recycle_browser(p, browser, contexts, watchdog, args)
+
         stop = time.time()
-        await browser.close() #close browser
+        await browser.close()
+
+    if frontier.dropped:
+        log(f"Crawl frontier full, dropped {frontier.dropped:,} discoveries")
+    print(f"{Colors.GRAY}  [Discovered {len(frontier.seen):,} Shorts, scraped {len(all_results):,}]{Colors.RESET}", flush=True)
+    save_outputs(all_results, args)
+    print(f"\n{Colors.GREEN} Completed  {len(all_results):,} Shorts in {time_taken(start, stop)}.{Colors.RESET}", flush=True)
+    return all_results
+
+async def refresh_corpus(args: argparse.Namespace) -> None:
+    """
+    Scheduler mode: every REFRESH_CYCLE seconds, send the most overdue items of the --sqlite
+    corpus through the regular bulk path, never more than --refresh URLs per hour.
+    """
+    scheduler = RefreshScheduler(open_snapshot_db(args.sqlite), short_id_from_url, posted_at, "upload_date")
+    if args.read:
+        added = scheduler.add(list(load_links(args.read)))
+        print(f"{Colors.GRAY}  [Added {added:,} new URLs to {args.sqlite}]{Colors.RESET}", flush=True)
+    batch = max(1, math.ceil(args.refresh * REFRESH_CYCLE / 3600))
+    rounds = 0
+    while True:
+        started = time.time()
+        urls = scheduler.due(batch)
+        rounds += 1
+        log(f"Refresh round {rounds}: {len(urls)} due (budget {batch})")
+        if urls:
+            await bulk_grab_short_info(set(urls), args)
+        else:
+            print(f"{Colors.GRAY}  [Refresh round {rounds}: nothing due]{Colors.RESET}", flush=True)
+        if args.cycles and rounds >= args.cycles:
+            break
+        await asyncio.sleep(max(0.0, REFRESH_CYCLE - (time.time() - started)))
+
+async def single_grab_short_info(url: str, args: argparse.Namespace) -> List[ShortMetaData]:
+    start = time.time()
+    short_info = None
+    if args.http:
+        results, _, stats = await http_grab_short_info([url], args)
+        short_info = results[0] if results else None
+        print(f"{Colors.GRAY}  [{stats.report()}]{Colors.RESET}", flush=True)
+    stop = time.time()
+
+    # Chromium only starts when the HTTP path missed or comments were asked for
+    if short_info is None or (args.max_comments and short_info.status == "ok"):
+        async with async_playwright() as p:
+            browser = await launch_browser(p, args.launch_profile)
+            if short_info is None:
+                context = await new_context(browser, args, storage_state_for(args, 0))
+                page = await context.new_page()
+                short_info = await grab_short_info(page,url)
+                stop = time.time()
+            if args.max_comments and short_info.status == "ok":
+                await bulk_short_comments([url], await ContextPool(browser, args).open(1), args)
+            await browser.close() #close browser
     
-    if short_info.title == "N/A":
+    if short_info.status == "failed":
         print(f"[{url}] Failed to retrieve data.", flush=True)
         return
+    if short_info.status != "ok":
+        print(f"[{url}] Short is {short_info.status.replace('_', ' ')}.", flush=True)
 
-    if args.csv:
-        save_shorts_csv([short_info], args.csv)
-        print(f"{Colors.GRAY}  [Saved CSV to: {args.csv}]{Colors.RESET}", flush=True)
-
-    if args.json:
-        save_shorts_json([short_info], args.json)
-        print(f"{Colors.GRAY}  [Saved JSON to: {args.json}]{Colors.RESET}", flush=True)
+    save_outputs([short_info], args)
     
     print(f"\n{Colors.GREEN}Completed in {time_taken(start, stop)}.{Colors.RESET}", flush=True)
 
@@ -331,18 +1026,281 @@ def parse_args():
         metavar="FILE",
         help="Export to JSON. If no FILE given, use --output or default 'output.json'."
     )
+    parser.add_argument(
+        "--sqlite",
+        nargs="?",
+        const=True,
+        metavar="FILE",
+        help="Append a snapshot of every item's counts to a SQLite database. If no FILE given, use --output or default 'output.db'."
+    )
+
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        type=int,
+        const=10,
+        metavar="N",
+        help="Profile the run and keep Playwright traces for the slowest N URLs (default 10) and any "
+             "failures. The report is written to '<output>.profile/'."
+    )
+
+    # Distributed work queue
+    parser.add_argument(
+        "--serve",
+        metavar="HOST:PORT",
+        help="Run as coordinator: queue the --read URLs and hand them out to --worker processes."
+    )
+    parser.add_argument(
+        "--worker",
+        metavar="HOST:PORT",
+        help="Run as worker: lease URL batches from the coordinator at HOST:PORT until the queue is done."
+    )
+    parser.add_argument(
+        "--queue-db",
+        type=Path,
+        default=Path("queue.db"),
+        metavar="FILE",
+        help="SQLite file backing the coordinator queue; reusing it resumes a run (default: queue.db)."
+    )
+    parser.add_argument(
+        "--lease",
+        type=float,
+        default=300.0,
+        metavar="SECONDS",
+        help="Coordinator lease length; unfinished batches are re-queued after it expires (default: 300)."
+    )
+
+    # Related-Shorts discovery
+    parser.add_argument(
+        "--crawl",
+        action="store_true",
+        help="Treat LINK / --read URLs as seeds and also scrape the Shorts the player surfaces after them."
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=2,
+        metavar="N",
+        help="Hops away from the seeds that --crawl follows (default: 2)."
+    )
+    parser.add_argument(
+        "--max-shorts",
+        type=int,
+        default=500,
+        metavar="N",
+        help="Stop --crawl after N Shorts, seeds included (default: 500)."
+    )
+
+    # Recurring refresh of a tracked corpus
+    parser.add_argument(
+        "--refresh",
+        type=int,
+        metavar="URLS_PER_HOUR",
+        help="Scheduler mode: keep re-scraping the --sqlite corpus (plus any --read URLs), fresh and "
+             "fast-growing items first, at most URLS_PER_HOUR."
+    )
+    parser.add_argument(
+        "--cycles",
+        type=int,
+        default=0,
+        metavar="N",
+        help=f"Stop --refresh after N rounds of {REFRESH_CYCLE // 60} minutes (default: run until interrupted)."
+    )
+
+    # Shared static asset cache
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        metavar="DIR",
+        help="Serve JS/CSS/font responses from an on-disk cache in DIR, shared by all contexts and later runs."
+    )
+    parser.add_argument(
+        "--cache-mb",
+        type=int,
+        default=512,
+        metavar="MB",
+        help="Size cap for --cache-dir; least recently used entries are evicted past it (default: 512)."
+    )
+
+    # Challenge circuit breaker
+    parser.add_argument(
+        "--challenge-threshold",
+        type=float,
+        default=0.5,
+        metavar="FRACTION",
+        help="Pause dispatching once this share of the last 20 pages hit a challenge (default: 0.5)."
+    )
+    parser.add_argument(
+        "--cooldown",
+        type=float,
+        default=300.0,
+        metavar="SECONDS",
+        help="Pause before a single probe page once the breaker trips; doubles while probes are "
+             "challenged (default: 300)."
+    )
+
+    # Storage state (consent/cookies) handling
+    parser.add_argument(
+        "--contexts",
+        type=int,
+        default=4,
+        metavar="N",
+        help="Isolated browser identities (user agent, locale, timezone, viewport, cookies) to spread "
+             "pages across; challenged ones are replaced (default: 4)."
+    )
+    parser.add_argument(
+        "--state",
+        type=Path,
+        nargs="+",
+        metavar="FILE",
+        help="Saved Playwright storage state(s) to start contexts from; several are rotated."
+    )
+    parser.add_argument(
+        "--warm-up",
+        type=Path,
+        nargs="+",
+        metavar="FILE",
+        help="Create storage state file(s) past the consent/cookie interstitial, then exit."
+    )
+    parser.add_argument(
+        "--launch-profile",
+        choices=list(LAUNCH_PROFILES),
+        default="default",
+        help="Chromium launch flags: 'default' (Playwright's), 'lean' (no GPU/compositing, no autoplay), "
+             "'minimal' (lean without images) or 'new-headless' (lean on the full Chromium build)."
+    )
+    parser.add_argument(
+        "--benchmark",
+        type=Path,
+        metavar="DIR",
+        help="Compare pages/sec and RSS of every --launch-profile on the saved .html pages in DIR, then exit."
+    )
+    parser.add_argument(
+        "--benchmark-loads",
+        type=int,
+        default=200,
+        metavar="N",
+        help="Page loads per launch profile for --benchmark (default: 200)."
+    )
+
+    # Browserless fast path
+    parser.add_argument(
+        "--http",
+        action="store_true",
+        help="Fetch pages over plain HTTP first and only open a browser when parsing fails (needs httpx)."
+    )
+    parser.add_argument(
+        "--http-connections",
+        type=int,
+        default=16,
+        metavar="N",
+        help="Maximum pooled HTTP connections for --http (default: 16)."
+    )
+    parser.add_argument(
+        "--listing",
+        action="store_true",
+        help="Fill title and rounded views of Shorts whose channel is recorded in --sqlite from one crawl of "
+             "that channel's Shorts tab (status 'listed', not stored as snapshots); only Shorts missing "
+             "from the listing are opened one by one."
+    )
+
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=60.0,
+        metavar="SECONDS",
+        help="Upper bound on the total time per URL, retries included. The actual budget adapts "
+             "to 3x the running p95 latency (default: 60)."
+    )
+    parser.add_argument(
+        "--max-browser-mb",
+        type=int,
+        default=int(psutil.virtual_memory().total / (1024 ** 2) // 2),
+        metavar="MB",
+        help="Recycle browser contexts (or restart Chromium) when its processes exceed MB of RSS "
+             "(default: half of system RAM, 0 disables)."
+    )
+
+    parser.add_argument(
+        "--pretty",
+        action="store_true",
+        help="Indent JSON output. By default it is written compact; .gz/.zst filenames are compressed."
+    )
+
+    # Optional comment stage
+    parser.add_argument(
+        "--max-comments",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Harvest up to N top-level comments per Short (disabled by default)."
+    )
+    parser.add_argument(
+        "--comments",
+        type=Path,
+        metavar="FILE",
+        help="JSONL file for harvested comments. Defaults to '<output>.comments.jsonl'."
+    )
 
     args = parser.parse_args()
 
+    if args.warm_up:
+        return args
+    if args.benchmark:
+        if not args.benchmark.is_dir():
+            parser.error(f"Fixture directory '{args.benchmark}' not found.")
+        if args.benchmark_loads <= 0:
+            parser.error("--benchmark-loads must be a positive number.")
+        return args
+
+    if args.cache_mb <= 0:
+        parser.error("--cache-mb must be a positive number.")
+    if args.contexts <= 0:
+        parser.error("--contexts must be a positive number.")
+    if not 0 < args.challenge_threshold <= 1:
+        parser.error("--challenge-threshold must be between 0 and 1.")
+
+    for state in args.state or []:
+        if not state.is_file():
+            parser.error(f"Storage state '{state}' not found. Create it with --warm-up.")
+
+    if args.serve and args.worker:
+        parser.error("Specify either --serve or --worker, not both.")
+    if args.worker:
+        return args  # workers take URLs from the coordinator and write no files
+    if args.serve and not args.read:
+        parser.error("--serve needs --read FILE to fill the queue.")
+
+    if args.listing:
+        if not args.sqlite:
+            parser.error("--listing needs --sqlite FILE recording the channel of each Short.")
+        if args.serve or args.crawl or args.refresh:
+            # listed rows lack likes/comments, so they cannot feed the snapshot history
+            parser.error("--listing cannot be combined with --serve, --crawl or --refresh.")
+
+    if args.crawl:
+        if args.serve or args.refresh:
+            parser.error("--crawl cannot be combined with --serve or --refresh.")
+        if args.depth < 0 or args.max_shorts <= 0:
+            parser.error("--depth must be 0 or more and --max-shorts a positive number.")
+
+    if args.refresh is not None:
+        if args.refresh <= 0:
+            parser.error("--refresh must be a positive number of URLs per hour.")
+        if not args.sqlite:
+            parser.error("--refresh needs --sqlite FILE holding the tracked corpus.")
+        if args.link or args.serve:
+            parser.error("--refresh takes its URLs from --sqlite (and --read), not a LINK or --serve.")
+
     # Validation: require input
-    if not args.link and not args.read:
+    if not (args.link or args.read or args.refresh):
         parser.error("Either a LINK or --read FILE must be provided.")
     if args.link and args.read:
         parser.error("Specify either a LINK or --read FILE, not both.")
 
     # Validation: require at least one output format
-    if not (args.csv or args.json):
-        parser.error("At least one output format (--csv or --json) is required.")
+    if not (args.csv or args.json or args.sqlite):
+        parser.error("At least one output format (--csv, --json or --sqlite) is required.")
 
     # Resolve output filenames intelligently
     # If --csv/--json used *without* filename (i.e., const=True), derive path
@@ -358,12 +1316,50 @@ def parse_args():
     elif args.json:
         args.json = Path(args.json)
 
+    if args.sqlite is True:
+        base = args.output or "output"
+        args.sqlite = Path(f"{base}.db")
+    elif args.sqlite:
+        args.sqlite = Path(args.sqlite)
+
+    if args.max_comments < 0:
+        parser.error("--max-comments must be a positive number.")
+    if args.max_comments and not args.comments:
+        args.comments = Path(f"{args.output or 'output'}.comments.jsonl")
+
     return args
 
 
 async def main():
+    scrape_common.LOG_FILE = "yt_shorts.log"
     args = parse_args()
-    if args.link:
+    args.profiler = RunProfiler(profile_dir(args), args.profile) if args.profile else None
+    args.static_cache = StaticCache(args.cache_dir, args.cache_mb) if args.cache_dir else None
+    if args.profiler:
+        args.profiler.profile.enable()
+    try:
+        await run(args)
+    finally:
+        if args.profiler:
+            args.profiler.profile.disable()
+            report = args.profiler.write_report()
+            print(f"{Colors.GRAY}  [Saved profile report to: {report}]{Colors.RESET}", flush=True)
+
+async def run(args: argparse.Namespace) -> None:
+    if args.benchmark:
+        await benchmark_profiles(args.benchmark, args.benchmark_loads, list(LAUNCH_PROFILES),
+                                 optimal_chunk_size(args.benchmark_loads))
+    elif args.warm_up:
+        await warm_up_storage_state(args.warm_up, args.launch_profile)
+    elif args.worker:
+        await run_worker(args, SITE, http_grab_short_info, scrape_short_chunk, optimal_chunk_size(10_000), "Shorts")
+    elif args.serve:
+        await serve_queue(list(load_links(args.read)), args, ShortMetaData, save_outputs, "Shorts")
+    elif args.refresh:
+        await refresh_corpus(args)
+    elif args.crawl:
+        await crawl_shorts([args.link] if args.link else list(load_links(args.read)), args)
+    elif args.link:
         await single_grab_short_info(args.link, args)
     elif args.read:
         urls = load_links(args.read)